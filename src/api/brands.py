@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Body
+from fastapi_cache.decorator import cache
 
-from src.api.dependencies import DBDep, require_permission
+from src.api.dependencies import DBDep, conditional_get, require_permission
 from src.core.permissions import Permission
 from src.exceptions.exception import BrandNotFoundException, BrandNotFoundHTTPException
 from src.schemas.brands import BrandsAdd, BrandsPatch
 from src.services.brands import BrandService
+from src.utils.http_cache import cache_key_builder
 
 router = APIRouter(prefix="/brands", tags=["Бренды"])
 
 
 @router.get("")
+@cache(expire=60, key_builder=cache_key_builder("brands"))
 async def get_brands(
-    db: DBDep, user_id: int = require_permission(Permission.VIEW_BRANDS)
+    db: DBDep,
+    user_id: int = require_permission(Permission.VIEW_BRANDS),
+    not_modified: None = conditional_get("brands"),
 ):
     return await BrandService(db).get_brands()
 
 
 @router.get("{brand_id}")
+@cache(expire=60, key_builder=cache_key_builder("brand:{brand_id}"))
 async def get_brand(
     db: DBDep, brand_id: int, user_id: int = require_permission(Permission.VIEW_BRANDS)
 ):
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Body
 from fastapi_cache.decorator import cache
 
-from src.api.dependencies import DBDep, require_permission
+from src.api.dependencies import DBDep, conditional_get, require_permission
 from src.core.permissions import Permission
 from src.exceptions.exception import (
     CategoryNotFoundException,
@@ -9,20 +9,24 @@ from src.exceptions.exception import (
 )
 from src.schemas.categories import CategoriesAdd, CategoriesPatch
 from src.services.categories import CategoryService
+from src.utils.http_cache import cache_key_builder
 
 
 router = APIRouter(prefix="/categories", tags=["Категории"])
 
 
 @router.get("")
-@cache(expire=10)
+@cache(expire=60, key_builder=cache_key_builder("categories"))
 async def get_categories(
-    db: DBDep, user_id: int = require_permission(Permission.VIEW_CATEGORIES)
+    db: DBDep,
+    user_id: int = require_permission(Permission.VIEW_CATEGORIES),
+    not_modified: None = conditional_get("categories"),
 ):
     return await CategoryService(db).get_categories()
 
 
 @router.get("/{category_id}")
+@cache(expire=60, key_builder=cache_key_builder("category:{category_id}"))
 async def get_category(
     db: DBDep,
     category_id: int,
@@ -1,5 +1,9 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import Annotated
-from fastapi import Depends, Request, Query
+from fastapi import Depends, HTTPException, Request, Response, Query
 from pydantic import BaseModel
 
 from src.core.permissions import Permission
@@ -9,9 +13,11 @@ from src.exceptions.exception import (
     IncorrectTokenHTTPException,
     PermissionDeniedHTTPException,
 )
+from src.config import settings
 from src.utils.db_manager import DBManager
-from src.database import async_session_maker
+from src.database import async_session_maker, async_session_maker_read
 from src.services.auth import AuthService
+from src.utils.http_cache import get_request_tag_versions, tag_version_time
 
 
 class PaginationParams(BaseModel):
@@ -29,19 +35,52 @@ def get_token(request: Request) -> str:
     return token
 
 
-def get_current_user_id(token: str = Depends(get_token)) -> int:
+def get_token_payload(token: str = Depends(get_token)) -> dict:
     try:
-        data = AuthService().decode_token(token)
+        return AuthService().decode_token(token)
     except IncorrectTokenException:
         raise IncorrectTokenHTTPException
-    return data["user_id"]
+
+
+def get_current_user_id(payload: dict = Depends(get_token_payload)) -> int:
+    return payload["user_id"]
 
 
 UserIdDep = Annotated[int, Depends(get_current_user_id)]
 
 
-async def get_db():
-    async with DBManager(session_factory=async_session_maker) as db:
+READ_METHODS = {"GET", "HEAD"}
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+
+def is_read_only_request(request: Request, response: Response) -> bool:
+    """Читающие запросы уходят на реплику, кроме короткого окна после записи.
+
+    Окно хранится в cookie, поэтому одинаково работает на всех воркерах.
+    """
+    if not settings.DB_REPLICA_URL:
+        return False
+    if request.method not in READ_METHODS:
+        sticky_until = int(time.time()) + settings.DB_REPLICA_STICKY_SECONDS
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(sticky_until),
+            max_age=settings.DB_REPLICA_STICKY_SECONDS,
+            httponly=True,
+        )
+        return False
+    sticky_until = request.cookies.get(PRIMARY_STICKY_COOKIE)
+    if sticky_until and sticky_until.isdigit() and int(sticky_until) > time.time():
+        return False
+    return True
+
+
+async def get_db(request: Request, response: Response):
+    async with DBManager(
+        session_factory=async_session_maker,
+        read_session_factory=async_session_maker_read,
+        read_only=is_read_only_request(request, response),
+    ) as db:
         yield db
 
 
@@ -61,5 +100,62 @@ def require_permission(permission: Permission):
     return Depends(dependency)
 
 
-async def get_user_permissions(db: DBDep, user_id: UserIdDep) -> dict:
-    return await AuthService(db).get_user_permissions(user_id=user_id)
+async def get_user_permissions(
+    db: DBDep, payload: dict = Depends(get_token_payload)
+) -> dict:
+    return await AuthService(db).get_permissions_from_token(payload)
+
+
+def conditional_get(*tags: str):
+    """ETag и Last-Modified по версиям тегов кеша, 304 - до обращения к БД.
+
+    Указывать после require_permission: зависимости выполняются по порядку,
+    и без прав клиент не должен получать даже 304. Заголовки в ответ
+    проставляет ConditionalGetMiddleware.
+    """
+
+    async def dependency(request: Request, db: DBDep) -> None:
+        versions = await get_request_tag_versions(request, *tags)
+        if versions is None:
+            return
+        modified_at = max(tag_version_time(version) for version in versions)
+        if settings.DB_REPLICA_URL and (
+            time.time() - modified_at.timestamp() < settings.DB_REPLICA_STICKY_SECONDS
+        ):
+            # Реплика может еще не видеть изменение, сменившее версию: тело
+            # под новым ETag (и в кеше ответа) собираем из основной БД
+            await db.use_primary()
+        query = sorted(request.query_params.multi_items())
+        raw = f"{request.url.path}:{query}:{versions}"
+        etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+        modified_at = modified_at.replace(microsecond=0)
+        last_modified = format_datetime(modified_at, usegmt=True)
+        request.state.etag = etag
+        request.state.last_modified = last_modified
+        if is_not_modified(request, etag, modified_at):
+            raise HTTPException(
+                status_code=304,
+                headers={"ETag": etag, "Last-Modified": last_modified},
+            )
+
+    return Depends(dependency)
+
+
+def is_not_modified(request: Request, etag: str, modified_at: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # При наличии If-None-Match дата не проверяется; сравнение слабое
+        candidates = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified_at <= since
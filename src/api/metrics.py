@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+
+from src.api.dependencies import require_permission
+from src.core.permissions import Permission
+from src.database import engine, read_engine, get_pool_metrics
+from src.init import permission_cache, product_cache, stampede_cache, token_cache
+
+router = APIRouter(prefix="/metrics", tags=["Метрики"])
+
+
+@router.get("/cache")
+async def get_cache_metrics(
+    user_id: int = require_permission(Permission.VIEW_DASHBOARD),
+):
+    return {
+        "tokens": token_cache.stats(),
+        "permissions": permission_cache.stats(),
+        "products_l1": product_cache.stats(),
+        "stampede": stampede_cache.stats(),
+    }
+
+
+@router.get("/db-pool")
+async def get_db_pool_metrics(
+    user_id: int = require_permission(Permission.VIEW_DASHBOARD),
+):
+    metrics = {"primary": get_pool_metrics(engine)}
+    if read_engine is not engine:
+        metrics["replica"] = get_pool_metrics(read_engine)
+    return metrics
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
 
 from src.api.dependencies import DBDep, UserIdDep, require_permission
 from src.core.permissions import Permission
@@ -11,6 +12,10 @@ from src.exceptions.exception import (
     AddressNotFoundHTTPException,
     ProductNotFoundException,
     ProductNotFoundHTTPException,
+    CheckoutJobNotFoundException,
+    CheckoutJobNotFoundHTTPException,
+    CheckoutQueueUnavailableException,
+    CheckoutQueueUnavailableHTTPException,
 )
 from src.schemas.orders import (
     OrdersAddRequest,
@@ -34,6 +39,14 @@ async def get_my_orders(
     return await OrderService(db).get_my_orders(user_id, target_user_id)
 
 
+@router.get("/checkout/{job_id}")
+async def get_checkout_job(db: DBDep, job_id: str, user_id: UserIdDep):
+    try:
+        return await OrderService(db).get_checkout_job(job_id, user_id)
+    except CheckoutJobNotFoundException:
+        raise CheckoutJobNotFoundHTTPException
+
+
 @router.get("/{order_id}")
 async def get_order(
     db: DBDep, order_id: int, user_id: int = require_permission(Permission.VIEW_ORDERS)
@@ -50,8 +63,23 @@ async def add_order(
     address_id: int,
     user_id: UserIdDep,
     order_data: OrdersAddRequest,
+    async_checkout: bool = Query(
+        False, description="Оформить в фоне: 202 и id задачи для опроса статуса"
+    ),
 ):
     try:
+        if async_checkout:
+            job_id = await OrderService(db).enqueue_order(
+                user_id, address_id, order_data
+            )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "status": "accepted",
+                    "job_id": job_id,
+                    "status_url": f"/orders/checkout/{job_id}",
+                },
+            )
         order = await OrderService(db).add_order(user_id, address_id, order_data)
     except CartNotExistsException:
         raise CartNotExistsHTTPException
@@ -59,6 +87,8 @@ async def add_order(
         raise AddressNotFoundHTTPException
     except ProductNotFoundException:
         raise ProductNotFoundHTTPException
+    except CheckoutQueueUnavailableException:
+        raise CheckoutQueueUnavailableHTTPException
     return {"status": "OK", "data": order}
 
 
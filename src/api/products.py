@@ -1,6 +1,14 @@
+from typing import Literal
+
 from fastapi import APIRouter, Query, Body, UploadFile, File
+from fastapi_cache.decorator import cache
 
-from src.api.dependencies import DBDep, PaginationDep, require_permission
+from src.api.dependencies import (
+    DBDep,
+    PaginationDep,
+    conditional_get,
+    require_permission,
+)
 from src.core.permissions import Permission
 from src.exceptions.exception import (
     ProductNotFoundException,
@@ -9,14 +17,18 @@ from src.exceptions.exception import (
     CategoryNotFoundHTTPException,
     BrandNotFoundException,
     BrandNotFoundHTTPException,
+    InvalidCursorException,
+    InvalidCursorHTTPException,
 )
-from src.schemas.products import ProductsAddRequest, ProductsPatch
+from src.schemas.products import ProductsAddRequest, ProductsPatch, ProductSortField
 from src.services.products import ProductService
+from src.utils.http_cache import cache_key_builder
 
 router = APIRouter(prefix="/products", tags=["Товары"])
 
 
 @router.get("")
+@cache(expire=10, key_builder=cache_key_builder("products"))
 async def get_products(
     db: DBDep,
     pagination: PaginationDep,
@@ -25,11 +37,30 @@ async def get_products(
     product_type: str | None = Query(
         None, description="Тип товара (clothing, footwear, accessory)"
     ),
+    sort_by: ProductSortField | None = Query(
+        None, description="Поле сортировки (по умолчанию - релевантность или id)"
+    ),
+    order: Literal["asc", "desc"] = Query("asc", description="Направление сортировки"),
+    cursor: str | None = Query(
+        None,
+        description="Курсор keyset-пагинации: пустое значение - первая страница, "
+        "далее next_cursor из ответа",
+    ),
     user_id: int = require_permission(Permission.VIEW_PRODUCTS),
+    not_modified: None = conditional_get("products"),
 ):
-    return await ProductService(db).get_products(
-        pagination, name, description, product_type
-    )
+    try:
+        return await ProductService(db).get_products(
+            pagination,
+            name,
+            description,
+            product_type,
+            sort_by=sort_by,
+            descending=order == "desc",
+            cursor=cursor,
+        )
+    except InvalidCursorException:
+        raise InvalidCursorHTTPException
 
 
 @router.get("{product_id}")
@@ -209,6 +240,30 @@ async def add_product_images(
     }
 
 
+@router.post("/{product_id}/stock-gate")
+async def enable_stock_gate(
+    db: DBDep,
+    product_id: int,
+    user_id: int = require_permission(Permission.EDIT_PRODUCTS),
+):
+    """Включить шлюз распродажи: остатки товара считаются в Redis"""
+    try:
+        await ProductService(db).enable_stock_gate(product_id)
+    except ProductNotFoundException:
+        raise ProductNotFoundHTTPException
+    return {"status": "OK"}
+
+
+@router.delete("/{product_id}/stock-gate")
+async def disable_stock_gate(
+    db: DBDep,
+    product_id: int,
+    user_id: int = require_permission(Permission.EDIT_PRODUCTS),
+):
+    await ProductService(db).disable_stock_gate(product_id)
+    return {"status": "OK"}
+
+
 @router.put("/{product_id}")
 async def exit_product(
     db: DBDep,
@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Body
+from fastapi_cache.decorator import cache
 
 from src.api.dependencies import DBDep, require_permission
 from src.core.permissions import Permission
 from src.exceptions.exception import RoleNotExistsException, RoleNotExistsHTTPException
 from src.schemas.roles import RoleAdd, RolePatch, RoleUpdate
 from src.services.roles import RoleService
+from src.utils.http_cache import cache_key_builder
 
 
 router = APIRouter(prefix="/roles", tags=["Роли"])
 
 
 @router.get("")
+@cache(expire=60, key_builder=cache_key_builder("roles"))
 async def get_roles(
     db: DBDep, user_id: int = require_permission(Permission.VIEW_ROLES)
 ):
@@ -18,6 +21,7 @@ async def get_roles(
 
 
 @router.get("/{role_name}")
+@cache(expire=60, key_builder=cache_key_builder("role:{role_name}"))
 async def get_role(
     db: DBDep, role_name: str, user_id: int = require_permission(Permission.VIEW_USERS)
 ):
@@ -12,6 +12,23 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
 
+    # Пул соединений на процесс: при N воркерах uvicorn в Postgres уходит
+    # до N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) соединений
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Совместимость с PgBouncer (pool_mode=transaction): без кеша выражений
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Реплика для чтения: без DB_REPLICA_HOST все запросы идут в основную БД
+    DB_REPLICA_HOST: str | None = None
+    DB_REPLICA_PORT: int | None = None
+    # Сколько секунд после записи пользователь читает из основной БД
+    DB_REPLICA_STICKY_SECONDS: int = 5
+
     REDIS_HOST: str
     REDIS_PORT: int
 
@@ -23,12 +40,66 @@ class Settings(BaseSettings):
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def DB_REPLICA_URL(self):
+        if not self.DB_REPLICA_HOST:
+            return None
+        port = self.DB_REPLICA_PORT or self.DB_PORT
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_REPLICA_HOST}:{port}/{self.DB_NAME}"
+
     model_config = SettingsConfigDict(env_file=".env")
 
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    # Встраивать маску прав роли в access-токен (проверка прав без запросов к БД)
+    JWT_EMBED_PERMISSIONS: bool = False
+    # Кеш проверенных токенов (запись живет до exp самого токена)
+    TOKEN_CACHE_SIZE: int = 50_000
+
+    # Хеширование паролей: стоимость bcrypt и размер пула/очереди
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Кеш прав: TTL в памяти процесса ограничивает рассинхрон между воркерами
+    PERMISSIONS_CACHE_SIZE: int = 10_000
+    PERMISSIONS_CACHE_TTL: int = 30
+    PERMISSIONS_REDIS_TTL: int = 600
+
+    # Idempotency-Key: сколько хранить ответ и сколько держать маркер
+    # выполняющегося запроса (должно превышать время самого долгого запроса)
+    IDEMPOTENCY_TTL: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_TTL: int = 60
+
+    # Сколько хранится статус фонового оформления заказа
+    CHECKOUT_JOB_TTL: int = 60 * 60
+
+    # Период выравнивания счетчиков шлюза распродаж по остаткам в БД
+    STOCK_GATE_RECONCILE_SECONDS: int = 30
+
+    # Резерв товара при добавлении в корзину и период очистки истекших резервов
+    CART_RESERVATION_TTL_MINUTES: int = 15
+    CART_RESERVATION_PURGE_SECONDS: int = 60
+
+    # Неоплаченные заказы старше окна отменяются пачками, остатки возвращаются
+    ORDER_PAYMENT_TIMEOUT_MINUTES: int = 30
+    ORDER_EXPIRY_BATCH_SIZE: int = 500
+    ORDER_EXPIRY_INTERVAL_SECONDS: int = 60
+
+    # Кеш карточек товаров; L1 в памяти процесса (0 - выключен) отстает
+    # от изменений в других воркерах не дольше PRODUCT_CACHE_L1_TTL секунд
+    PRODUCT_CACHE_TTL: int = 300
+    PRODUCT_CACHE_L1_SIZE: int = 0
+    PRODUCT_CACHE_L1_TTL: int = 2
+    CATEGORIES_CACHE_TTL: int = 300
+
+    # Защита от лавины промахов: сколько отдавать устаревшее значение, пока
+    # один запрос его пересчитывает, и сколько ждать чужого пересчета
+    CACHE_STALE_TTL: int = 60
+    CACHE_LOCK_TTL: int = 10
+    CACHE_LOCK_WAIT: float = 2.0
 
 
 settings = Settings()
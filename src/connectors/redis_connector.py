@@ -3,7 +3,7 @@ import redis.asyncio as redis
 
 
 class RedisConnector:
-    _redis: redis.Redis
+    _redis: redis.Redis | None = None
 
     def __init__(self, host: str, port: int):
         self.host = host
@@ -14,18 +14,58 @@ class RedisConnector:
         self._redis = redis.Redis(host=self.host, port=self.port)
         logging.info(f"Успешное подключение к Redis host{self.host}, port{self.port}")
 
+    @property
+    def is_connected(self) -> bool:
+        return self._redis is not None
+
     async def set(self, key: str, value: str, expire: int | None = None):
         if expire:
             await self._redis.set(key, value, ex=expire)
         else:
             await self._redis.set(key, value)
 
+    async def set_if_not_exists(
+        self, key: str, value: str, expire: int | None = None
+    ) -> bool:
+        return bool(await self._redis.set(key, value, ex=expire, nx=True))
+
     async def get(self, key: str):
         return await self._redis.get(key)
 
+    async def mget(self, *keys: str) -> list:
+        return await self._redis.mget(keys)
+
+    async def mset(self, mapping: dict[str, str]):
+        await self._redis.mset(mapping)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self._redis.exists(key))
+
     async def delete(self, key: str):
         await self._redis.delete(key)
 
+    async def eval(self, script: str, keys: list[str], args: list):
+        return await self._redis.eval(script, len(keys), *keys, *args)
+
+    async def sadd(self, key: str, *values):
+        await self._redis.sadd(key, *values)
+
+    async def srem(self, key: str, *values):
+        await self._redis.srem(key, *values)
+
+    async def smembers(self, key: str) -> set:
+        return await self._redis.smembers(key)
+
+    async def publish(self, channel: str, message: str):
+        await self._redis.publish(channel, message)
+
+    def pubsub(self):
+        return self._redis.pubsub()
+
     async def close(self) -> None:
         if self._redis:
             await self._redis.close()
+            self._redis = None
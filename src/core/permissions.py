@@ -1,7 +1,11 @@
+import hashlib
+import json
 from enum import Enum
 
 
 class Permission(str, Enum):
+    # Порядок членов задает номера битов в маске прав access-токена:
+    # новые права добавлять только в конец
     # Roles
     VIEW_ROLES = "view_roles"
     MANAGE_ROLES = "manage_roles"
@@ -144,3 +148,26 @@ ROLE_PERMISSIONS = {
         Permission.VIEW_ANALYTICS,
     ],
 }
+
+
+PERMISSION_BITS = {perm.value: 1 << index for index, perm in enumerate(Permission)}
+
+
+def permissions_to_mask(permissions: dict) -> int:
+    """Упаковывает словарь прав роли в битовую маску"""
+    mask = 0
+    for name, allowed in permissions.items():
+        if allowed and name in PERMISSION_BITS:
+            mask |= PERMISSION_BITS[name]
+    return mask
+
+
+def mask_to_permissions(mask: int) -> dict:
+    """Восстанавливает словарь прав из битовой маски"""
+    return {name: True for name, bit in PERMISSION_BITS.items() if mask & bit}
+
+
+def permissions_version(permissions: dict) -> str:
+    """Короткий отпечаток прав роли: меняется при любом изменении прав"""
+    payload = json.dumps(permissions, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
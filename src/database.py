@@ -1,10 +1,93 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import time
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
 from src.config import settings
 
-engine = create_async_engine(settings.DB_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, учитывающий время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+
+def get_engine_connect_args() -> dict:
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer в transaction-режиме не держит подготовленные выражения
+        # между транзакциями: отключаем оба кеша и делаем имена уникальными
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=get_engine_connect_args(),
+    )
+
+
+def get_pool_metrics(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    checkouts = getattr(pool, "checkouts", 0)
+    wait_time_total = getattr(pool, "wait_time_total", 0.0)
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": checkouts,
+        "wait_time_avg_ms": wait_time_total / checkouts * 1000 if checkouts else 0.0,
+        "wait_time_max_ms": getattr(pool, "wait_time_max", 0.0) * 1000,
+    }
+
+
+engine = create_engine(settings.DB_URL)
 async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
 
+read_engine = (
+    create_engine(settings.DB_REPLICA_URL) if settings.DB_REPLICA_URL else engine
+)
+async_session_maker_read = async_sessionmaker(bind=read_engine, expire_on_commit=False)
+
+# Для Celery-задач: каждая задача крутит свой event loop через asyncio.run,
+# а соединения пула привязаны к циклу, в котором созданы
+engine_null_pool = create_async_engine(
+    settings.DB_URL, poolclass=NullPool, connect_args=get_engine_connect_args()
+)
+async_session_maker_null_pool = async_sessionmaker(
+    bind=engine_null_pool, expire_on_commit=False
+)
+
 
 class Base(DeclarativeBase):
     pass
@@ -44,10 +44,32 @@ class ProductNotFoundException(FashionStoreException):
     detail = "Товар не найден"
 
 
+class InvalidCursorException(FashionStoreException):
+    detail = "Некорректный курсор пагинации"
+
+
 class NotAllProductsAvailableException(FashionStoreException):
     detail = "Не все товары доступны"
 
 
+class ProductSoldOutException(FashionStoreException):
+    detail = "Товар распродан"
+
+    def __init__(self, product_id: int):
+        self.product_id = product_id
+        super().__init__()
+
+
+class InsufficientStockException(FashionStoreException):
+    detail = "Недостаточно товара на складе"
+
+    def __init__(self, product_id: int, product: str, available: int):
+        self.product_id = product_id
+        self.product = product
+        self.available = available
+        super().__init__()
+
+
 class AddressNotFoundException(FashionStoreException):
     detail = "Адрес не найден"
 
@@ -64,6 +86,14 @@ class OrderNotFoundException(FashionStoreException):
     detail = "Заказ не найден"
 
 
+class CheckoutJobNotFoundException(FashionStoreException):
+    detail = "Задача оформления заказа не найдена"
+
+
+class CheckoutQueueUnavailableException(FashionStoreException):
+    detail = "Очередь оформления заказов недоступна"
+
+
 class OrderItemNotFoundException(FashionStoreException):
     detail = "Элемент заказа не найден"
 
@@ -134,6 +164,11 @@ class WrongTokenTypeHTTPException(FashionStoreHTTPException):
     detail = "Неправильный тип токена"
 
 
+class TokenPermissionsOutdatedHTTPException(FashionStoreHTTPException):
+    status_code = 401
+    detail = "Права роли изменились, обновите токен доступа"
+
+
 class UserAlreadyExistsHTTPException(FashionStoreHTTPException):
     status_code = 404
     detail = "Пользователь уже существует"
@@ -169,6 +204,11 @@ class IncorrectPasswordHTTPException(FashionStoreHTTPException):
     detail = "Неверный логин или пароль"
 
 
+class PasswordHasherBusyHTTPException(FashionStoreHTTPException):
+    status_code = 503
+    detail = "Сервис авторизации перегружен, повторите попытку позже"
+
+
 class UnableDeleteRoleHTTPException(FashionStoreHTTPException):
     status_code = 400
     detail = (
@@ -191,6 +231,11 @@ class ProductNotFoundHTTPException(FashionStoreHTTPException):
     detail = "Товар не найден"
 
 
+class InvalidCursorHTTPException(FashionStoreHTTPException):
+    status_code = 400
+    detail = "Некорректный курсор пагинации"
+
+
 class CancelledOrderHTTPException(FashionStoreHTTPException):
     status_code = 400
     detail = "Отмененный заказ можно только вернуть"
@@ -247,6 +292,14 @@ class ProductAlreadyInOrderHTTPException(FashionStoreHTTPException):
         super().__init__(text=product)
 
 
+class ProductSoldOutHTTPException(FashionStoreHTTPException):
+    status_code = 409
+    detail = "Товар {text} распродан"
+
+    def __init__(self, product_id: int):
+        super().__init__(text=product_id)
+
+
 class NotAllProductsAvailableHTTPException(FashionStoreHTTPException):
     status_code = 400
     detail = "Не все товары доступны"
@@ -280,6 +333,16 @@ class CannotRemoveCategoryHTTPException(FashionStoreHTTPException):
         super().__init__(category=category, product_ids=str(product_ids))
 
 
+class CheckoutJobNotFoundHTTPException(FashionStoreHTTPException):
+    status_code = 404
+    detail = "Задача оформления заказа не найдена"
+
+
+class CheckoutQueueUnavailableHTTPException(FashionStoreHTTPException):
+    status_code = 503
+    detail = "Очередь оформления заказов недоступна, повторите попытку позже"
+
+
 class CartNotExistsHTTPException(FashionStoreHTTPException):
     status_code = 404
     detail = "Корзины не существует"
@@ -1,4 +1,50 @@
 from src.connectors.redis_connector import RedisConnector
 from src.config import settings
+from src.utils.cache import TTLCache
+from src.utils.checkout_jobs import CheckoutJobStore
+from src.utils.password_hasher import PasswordHasher
+from src.utils.permission_cache import PermissionCache
+from src.utils.product_cache import ProductCache
+from src.utils.reference_cache import ReferenceDataCache
+from src.utils.stampede_cache import StampedeCache
+from src.utils.stock_gate import StockGate
 
 redis_connector = RedisConnector(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+
+permission_cache = PermissionCache(
+    redis_connector,
+    maxsize=settings.PERMISSIONS_CACHE_SIZE,
+    ttl=settings.PERMISSIONS_CACHE_TTL,
+    redis_ttl=settings.PERMISSIONS_REDIS_TTL,
+)
+
+reference_cache = ReferenceDataCache(redis_connector, permission_cache)
+
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+stock_gate = StockGate(redis_connector)
+
+stampede_cache = StampedeCache(
+    redis_connector,
+    stale_ttl=settings.CACHE_STALE_TTL,
+    lock_ttl=settings.CACHE_LOCK_TTL,
+    lock_wait=settings.CACHE_LOCK_WAIT,
+)
+
+product_cache = ProductCache(
+    stampede_cache,
+    ttl=settings.PRODUCT_CACHE_TTL,
+    l1_maxsize=settings.PRODUCT_CACHE_L1_SIZE,
+    l1_ttl=settings.PRODUCT_CACHE_L1_TTL,
+)
+
+checkout_jobs = CheckoutJobStore(redis_connector, ttl=settings.CHECKOUT_JOB_TTL)
+
+password_hasher = PasswordHasher(
+    rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
@@ -14,7 +14,11 @@ from fastapi import FastAPI
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 
-from src.init import redis_connector
+from src.config import settings
+from src.database import async_session_maker
+from src.init import redis_connector, password_hasher, reference_cache
+from src.middlewares.conditional_get import ConditionalGetMiddleware
+from src.middlewares.idempotency import IdempotencyMiddleware
 from src.api.addresses import router as router_address
 from src.api.brands import router as router_brand
 from src.api.categories import router as router_category
@@ -26,17 +30,28 @@ from src.api.products import router as router_product
 from src.api.reviews import router as router_review
 from src.api.roles import router as router_role
 from src.api.auth import router as router_auth
+from src.api.metrics import router as router_metrics
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await redis_connector.connect()
     FastAPICache.init(RedisBackend(redis_connector._redis), prefix="fastapi-cache")
+    await reference_cache.start(async_session_maker)
     yield
+    await reference_cache.stop()
     await redis_connector.close()
+    password_hasher.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    IdempotencyMiddleware,
+    redis_connector=redis_connector,
+    ttl=settings.IDEMPOTENCY_TTL,
+    lock_ttl=settings.IDEMPOTENCY_LOCK_TTL,
+)
+app.add_middleware(ConditionalGetMiddleware)
 
 app.include_router(router_address)
 app.include_router(router_brand)
@@ -49,6 +64,7 @@ app.include_router(router_product)
 app.include_router(router_review)
 app.include_router(router_role)
 app.include_router(router_auth)
+app.include_router(router_metrics)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ConditionalGetMiddleware:
+    """Проставляет ETag и Last-Modified, вычисленные зависимостью conditional_get.
+
+    Заголовки пишутся на уровне ASGI, после эндпоинта: fastapi-cache при
+    попадании в кеш ставит свой ETag (hash() тела, разный на разных воркерах)
+    и Cache-Control с max-age, из-за которого клиент не перепроверял бы данные.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+
+        async def send_with_validators(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                state = scope.get("state") or {}
+                etag = state.get("etag")
+                if etag:
+                    headers = MutableHeaders(scope=message)
+                    headers["ETag"] = etag
+                    headers["Last-Modified"] = state["last_modified"]
+                    headers["Cache-Control"] = "private, no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -0,0 +1,203 @@
+import base64
+import hashlib
+import json
+import logging
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.connectors.redis_connector import RedisConnector
+from src.services.auth import AuthService
+
+
+class IdempotencyMiddleware:
+    """Обработка заголовка Idempotency-Key для изменяющих запросов.
+
+    Первый запрос с ключом ставит в Redis маркер "в процессе" и по
+    завершении сохраняет ответ. Повтор получает сохраненный ответ без
+    повторного выполнения, параллельный дубль - 409, тот же ключ с другим
+    телом - 422. Ответы 5xx не сохраняются, чтобы клиент мог повторить запрос.
+    Ключи разделены по пользователям; запросы без токена и Set-Cookie в
+    сохраненных ответах не обрабатываются.
+    """
+
+    HEADER = "Idempotency-Key"
+    KEY = "idempotency:{owner}:{key}"
+    MAX_KEY_LENGTH = 255
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        redis_connector: RedisConnector,
+        ttl: int,
+        lock_ttl: int,
+        methods: frozenset[str] = frozenset({"POST", "PUT", "PATCH", "DELETE"}),
+    ):
+        self.app = app
+        self.redis_connector = redis_connector
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.methods = methods
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            return await self.app(scope, receive, send)
+        idempotency_key = Headers(scope=scope).get(self.HEADER)
+        # Без Redis ключ игнорируем: запрос выполняется как обычно
+        if not idempotency_key or not self.redis_connector.is_connected:
+            return await self.app(scope, receive, send)
+        if len(idempotency_key) > self.MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": "Слишком длинный Idempotency-Key"}, status_code=400
+            )
+            return await response(scope, receive, send)
+
+        # Без пользователя не у кого разделять ключи: общий "анонимный"
+        # скоуп отдавал бы одному клиенту ответ другого
+        owner = self._owner(Request(scope))
+        if owner is None:
+            return await self.app(scope, receive, send)
+
+        body = await self._read_body(receive)
+        fingerprint = self._fingerprint(scope, body)
+        redis_key = self.KEY.format(owner=owner, key=idempotency_key)
+
+        marker = json.dumps({"state": "in_progress", "fingerprint": fingerprint})
+        try:
+            acquired = await self.redis_connector.set_if_not_exists(
+                redis_key, marker, expire=self.lock_ttl
+            )
+        except Exception as e:
+            logging.warning(f"Idempotency-Key не обработан, Redis недоступен: {e}")
+            return await self.app(scope, self._replay_body(body, receive), send)
+
+        if not acquired:
+            response = await self._stored_response(redis_key, fingerprint)
+            if response is None:
+                return await self.app(scope, self._replay_body(body, receive), send)
+            return await response(scope, receive, send)
+
+        status_code, headers, chunks = None, [], []
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, self._replay_body(body, receive), send_and_capture)
+        except BaseException:
+            await self._forget(redis_key)
+            raise
+
+        if status_code is None or status_code >= 500:
+            await self._forget(redis_key)
+            return
+        stored = {
+            "state": "completed",
+            "fingerprint": fingerprint,
+            "status_code": status_code,
+            # Cookie (токены входа) в Redis не храним и при повторе не отдаем
+            "headers": [
+                [k.decode("latin-1"), v.decode("latin-1")]
+                for k, v in headers
+                if k.lower() != b"set-cookie"
+            ],
+            "body": base64.b64encode(b"".join(chunks)).decode(),
+        }
+        try:
+            await self.redis_connector.set(
+                redis_key, json.dumps(stored), expire=self.ttl
+            )
+        except Exception as e:
+            logging.error(f"Не удалось сохранить ответ для Idempotency-Key: {e}")
+
+    async def _stored_response(
+        self, redis_key: str, fingerprint: str
+    ) -> Response | None:
+        """Ответ по сохраненной записи; None - Redis недоступен"""
+        try:
+            cached = await self.redis_connector.get(redis_key)
+        except Exception as e:
+            logging.warning(f"Idempotency-Key не обработан, Redis недоступен: {e}")
+            return None
+        stored = json.loads(cached) if cached else None
+        if stored is None or stored["state"] == "in_progress":
+            return JSONResponse(
+                {"detail": "Запрос с этим Idempotency-Key еще выполняется"},
+                status_code=409,
+            )
+        if stored["fingerprint"] != fingerprint:
+            return JSONResponse(
+                {"detail": "Idempotency-Key уже использован для другого запроса"},
+                status_code=422,
+            )
+        response = Response(
+            content=base64.b64decode(stored["body"]),
+            status_code=stored["status_code"],
+        )
+        response.raw_headers = [
+            (k.encode("latin-1"), v.encode("latin-1")) for k, v in stored["headers"]
+        ]
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    async def _forget(self, redis_key: str) -> None:
+        try:
+            await self.redis_connector.delete(redis_key)
+        except Exception as e:
+            logging.error(f"Не удалось снять маркер Idempotency-Key: {e}")
+
+    @staticmethod
+    def _owner(request: Request) -> str | None:
+        token = request.cookies.get("access_token")
+        if not token:
+            return None
+        try:
+            return str(AuthService().decode_token(token)["user_id"])
+        except HTTPException:
+            # Недействительный токен отклонит сам эндпоинт
+            return None
+
+    @staticmethod
+    def _fingerprint(scope: Scope, body: bytes) -> str:
+        digest = hashlib.sha256()
+        digest.update(scope["method"].encode())
+        digest.update(scope["path"].encode())
+        digest.update(scope.get("query_string", b""))
+        digest.update(body)
+        return digest.hexdigest()
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay_body(body: bytes, receive: Receive) -> Receive:
+        """Отдает приложению уже прочитанное тело, дальше - исходный receive"""
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return replay
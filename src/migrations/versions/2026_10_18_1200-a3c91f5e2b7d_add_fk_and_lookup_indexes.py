@@ -0,0 +1,59 @@
+"""add fk and lookup indexes
+
+Revision ID: a3c91f5e2b7d
+Revises: 6ee3acd485e7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c91f5e2b7d"
+down_revision: Union[str, Sequence[str], None] = "6ee3acd485e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_addresses_user_id", "addresses", ["user_id"]),
+    ("ix_cart_items_cart_id", "cart_items", ["cart_id"]),
+    ("ix_cart_items_product_id", "cart_items", ["product_id"]),
+    ("ix_order_items_order_id_product_id", "order_items", ["order_id", "product_id"]),
+    ("ix_order_items_product_id", "order_items", ["product_id"]),
+    ("ix_orders_address_id", "orders", ["address_id"]),
+    ("ix_orders_user_id", "orders", ["user_id"]),
+    ("ix_products_brand_id", "products", ["brand_id"]),
+    ("ix_products_category_id", "products", ["category_id"]),
+    ("ix_products_product_type", "products", ["product_type"]),
+    ("ix_reviews_product_id", "reviews", ["product_id"]),
+    ("ix_reviews_user_id", "reviews", ["user_id"]),
+    ("ix_users_role_id", "users", ["role_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицы, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,52 @@
+"""add products trigram search
+
+Revision ID: 5d8e4b7a9c13
+Revises: a3c91f5e2b7d
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8e4b7a9c13"
+down_revision: Union[str, Sequence[str], None] = "a3c91f5e2b7d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGRAM_INDEXES = [
+    ("ix_products_name_trgm", "name"),
+    ("ix_products_description_trgm", "description"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name,
+                "products",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in TRIGRAM_INDEXES:
+            op.drop_index(
+                name,
+                table_name="products",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,49 @@
+"""add products keyset indexes
+
+Revision ID: 8b2f6c1d4e57
+Revises: 5d8e4b7a9c13
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2f6c1d4e57"
+down_revision: Union[str, Sequence[str], None] = "5d8e4b7a9c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+KEYSET_INDEXES = [
+    ("ix_products_price_id", ["price", "id"]),
+    ("ix_products_created_at_id", ["created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns in KEYSET_INDEXES:
+            op.create_index(
+                name,
+                "products",
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in KEYSET_INDEXES:
+            op.drop_index(
+                name,
+                table_name="products",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,29 @@
+"""add order number sequence
+
+Revision ID: c47e2a9d1b60
+Revises: 8b2f6c1d4e57
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c47e2a9d1b60"
+down_revision: Union[str, Sequence[str], None] = "8b2f6c1d4e57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence("order_number_seq", cache=50)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence("order_number_seq")))
@@ -0,0 +1,63 @@
+"""add cart reservations
+
+Revision ID: e91b3f7c2a48
+Revises: c47e2a9d1b60
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e91b3f7c2a48"
+down_revision: Union[str, Sequence[str], None] = "c47e2a9d1b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "cart_reservations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cart_id", sa.Integer(), nullable=False),
+        sa.Column("cart_item_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["cart_id"],
+            ["carts.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["cart_item_id"],
+            ["cart_items.id"],
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("cart_item_id"),
+    )
+    op.create_index(
+        op.f("ix_cart_reservations_cart_id"), "cart_reservations", ["cart_id"]
+    )
+    op.create_index(
+        op.f("ix_cart_reservations_expires_at"), "cart_reservations", ["expires_at"]
+    )
+    op.create_index(
+        "ix_cart_reservations_product_id_expires_at",
+        "cart_reservations",
+        ["product_id", "expires_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("cart_reservations")
@@ -0,0 +1,43 @@
+"""add orders pending created_at index
+
+Revision ID: f3a8d2c6b914
+Revises: e91b3f7c2a48
+Create Date: 2026-10-18 12:50:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8d2c6b914"
+down_revision: Union[str, Sequence[str], None] = "e91b3f7c2a48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_pending_created_at_id",
+            "orders",
+            ["created_at", "id"],
+            postgresql_where=sa.text("status = 'pending'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_orders_pending_created_at_id",
+            table_name="orders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
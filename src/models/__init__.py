@@ -1,4 +1,5 @@
 from src.models.cart_items import CartItemOrm
+from src.models.cart_reservations import CartReservationOrm
 from src.models.carts import CartOrm
 from src.models.order_items import OrderItemOrm
 from src.models.orders import OrderOrm
@@ -21,5 +22,6 @@ __all__ = [
     "AddressOrm",
     "BrandOrm",
     "CartItemOrm",
+    "CartReservationOrm",
     "ProductOrm",
 ]
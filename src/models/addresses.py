@@ -7,7 +7,7 @@ class AddressOrm(Base):
     __tablename__ = "addresses"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     address_line: Mapped[str]
     city: Mapped[str]
     postal_code: Mapped[str]
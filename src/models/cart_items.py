@@ -8,7 +8,7 @@ class CartItemOrm(Base):
     __tablename__ = "cart_items"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id"))
-    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id"), index=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), index=True)
     quantity: Mapped[int] = mapped_column(default=1)
     selected_size: Mapped[Optional[str]]
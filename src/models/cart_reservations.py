@@ -0,0 +1,22 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Index
+from datetime import datetime
+from src.database import Base
+
+
+class CartReservationOrm(Base):
+    __tablename__ = "cart_reservations"
+    # Доступность товара суммирует активные резервы только по этому индексу,
+    # не перебирая корзины
+    __table_args__ = (
+        Index("ix_cart_reservations_product_id_expires_at", "product_id", "expires_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    cart_id: Mapped[int] = mapped_column(ForeignKey("carts.id"), index=True)
+    cart_item_id: Mapped[int] = mapped_column(
+        ForeignKey("cart_items.id", ondelete="CASCADE"), unique=True
+    )
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    quantity: Mapped[int]
+    expires_at: Mapped[datetime] = mapped_column(index=True)
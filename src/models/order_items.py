@@ -1,13 +1,17 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, CheckConstraint
+from sqlalchemy import ForeignKey, CheckConstraint, Index
 from src.database import Base
 
 
 class OrderItemOrm(Base):
     __tablename__ = "order_items"
+    # Составной индекс покрывает и выборки только по order_id
+    __table_args__ = (
+        Index("ix_order_items_order_id_product_id", "order_id", "product_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
-    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), index=True)
     quantity: Mapped[int] = mapped_column(CheckConstraint("quantity >= 0"))
     final_price: Mapped[float] = mapped_column(CheckConstraint("final_price >= 0"))
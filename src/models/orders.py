@@ -1,16 +1,29 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, CheckConstraint, Enum
+from sqlalchemy import ForeignKey, CheckConstraint, Enum, Index, Sequence, text
 from datetime import datetime
 from src.database import Base
 
+# Источник номеров заказов. CACHE выдает каждому соединению блок значений,
+# так что nextval не упирается в общую блокировку последовательности
+order_number_seq = Sequence("order_number_seq", cache=50, metadata=Base.metadata)
+
 
 class OrderOrm(Base):
     __tablename__ = "orders"
+    # Поиск неоплаченных заказов для истечения не сканирует всю таблицу
+    __table_args__ = (
+        Index(
+            "ix_orders_pending_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     order_number: Mapped[str] = mapped_column(unique=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    address_id: Mapped[int] = mapped_column(ForeignKey("addresses.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    address_id: Mapped[int] = mapped_column(ForeignKey("addresses.id"), index=True)
 
     status: Mapped[str] = mapped_column(
         Enum(
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, CheckConstraint, Enum, JSON, Text
+from sqlalchemy import ForeignKey, CheckConstraint, Enum, JSON, Text, Index
 from datetime import datetime
 from typing import Optional
 from src.database import Base
@@ -7,11 +7,29 @@ from src.database import Base
 
 class ProductOrm(Base):
     __tablename__ = "products"
+    # Триграммные GIN-индексы (pg_trgm) для поиска по подстроке и с опечатками
+    __table_args__ = (
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_products_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        # Индексы для keyset-пагинации по (ключ сортировки, id)
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
-    brand_id: Mapped[int] = mapped_column(ForeignKey("brands.id"))
-    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
+    brand_id: Mapped[int] = mapped_column(ForeignKey("brands.id"), index=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), index=True)
     price: Mapped[float] = mapped_column(CheckConstraint("price > 0"), nullable=False)
     stock_quantity: Mapped[int] = mapped_column(
         CheckConstraint("stock_quantity >= 0"), default=0
@@ -19,7 +37,7 @@ class ProductOrm(Base):
 
     # Тип товара - ограниченный набор значений
     product_type: Mapped[str] = mapped_column(
-        Enum("clothing", "footwear", "accessory", name="product_type")
+        Enum("clothing", "footwear", "accessory", name="product_type"), index=True
     )
 
     description: Mapped[str] = mapped_column(Text, nullable=False)
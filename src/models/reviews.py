@@ -9,8 +9,8 @@ class ReviewOrm(Base):
     __tablename__ = "reviews"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), index=True)
     rating: Mapped[int] = mapped_column(CheckConstraint("rating BETWEEN 1 AND 5"))
     comment: Mapped[Optional[str]]
     images: Mapped[Optional[list[str]]] = mapped_column(JSON, default=list)
@@ -50,6 +50,16 @@ class BaseRepository:
             raise ObjectNotFoundException
         return self.mapper.map_to_domain_entity(model)
 
+    async def get_one_for_update(self, **filter_by) -> BaseModel:
+        """Строка из БД под FOR UPDATE - для чтения-изменения-записи"""
+        query = select(self.model).filter_by(**filter_by).with_for_update()
+        result = await self.session.execute(query)
+        try:
+            model = result.scalar_one()
+        except NoResultFound:
+            raise ObjectNotFoundException
+        return self.mapper.map_to_domain_entity(model)
+
     async def add(self, data: BaseModel) -> BaseModel | None:
         try:
             stmt = insert(self.model).values(**data.model_dump()).returning(self.model)
@@ -81,5 +91,5 @@ class BaseRepository:
         await self.session.execute(stmt)
 
     async def delete(self, *filter, **filter_by):
-        stmt = delete(self.model).filter_by(**filter_by)
+        stmt = delete(self.model).filter(*filter).filter_by(**filter_by)
         await self.session.execute(stmt)
@@ -1,3 +1,5 @@
+from sqlalchemy import exists, select
+
 from src.repositories.base import BaseRepository
 from src.models.cart_items import CartItemOrm
 from src.repositories.mappers.mappers import CartItemDataMapper
@@ -6,3 +8,11 @@ from src.repositories.mappers.mappers import CartItemDataMapper
 class CartItemsRepository(BaseRepository):
     model = CartItemOrm
     mapper = CartItemDataMapper
+
+    async def has_items(self, cart_id: int) -> bool:
+        query = select(exists().where(self.model.cart_id == cart_id))
+        result = await self.session.execute(query)
+        return result.scalar()
+
+    async def delete_by_ids(self, item_ids: list[int]) -> None:
+        await self.delete(self.model.id.in_(item_ids))
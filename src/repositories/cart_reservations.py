@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.repositories.base import BaseRepository
+from src.models.cart_reservations import CartReservationOrm
+from src.repositories.mappers.mappers import CartReservationDataMapper
+from src.schemas.cart_reservations import CartReservationAdd
+
+
+class CartReservationsRepository(BaseRepository):
+    model = CartReservationOrm
+    mapper = CartReservationDataMapper
+
+    @classmethod
+    def held_quantity(
+        cls, product_id, exclude_cart_id=None, now: datetime | None = None
+    ):
+        """Скалярный подзапрос: сумма активных резервов товара product_id
+        (колонка внешнего запроса), кроме резервов корзины exclude_cart_id"""
+        model = cls.model
+        query = select(func.coalesce(func.sum(model.quantity), 0)).where(
+            model.product_id == product_id,
+            model.expires_at > (now or datetime.utcnow()),
+        )
+        if exclude_cart_id is not None:
+            query = query.where(model.cart_id != exclude_cart_id)
+        return query.scalar_subquery()
+
+    async def hold(self, data: CartReservationAdd) -> None:
+        """Создает или продлевает резерв позиции корзины"""
+        stmt = insert(self.model).values(**data.model_dump())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.cart_item_id],
+            set_={
+                "quantity": stmt.excluded.quantity,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def delete_expired(self, now: datetime) -> int:
+        stmt = (
+            delete(self.model)
+            .where(self.model.expires_at <= now)
+            .returning(self.model.id)
+        )
+        result = await self.session.execute(stmt)
+        return len(result.all())
@@ -2,6 +2,7 @@ from src.models import (
     AddressOrm,
     BrandOrm,
     CartItemOrm,
+    CartReservationOrm,
     CartOrm,
     CategoryOrm,
     OrderItemOrm,
@@ -15,6 +16,7 @@ from src.repositories.mappers.base import DataMapper
 from src.schemas.addresses import Address
 from src.schemas.brands import Brand
 from src.schemas.cart_items import CartItem
+from src.schemas.cart_reservations import CartReservation
 from src.schemas.carts import Cart
 from src.schemas.categories import Category
 from src.schemas.order_items import OrderItem
@@ -40,6 +42,11 @@ class CartItemDataMapper(DataMapper):
     schema = CartItem
 
 
+class CartReservationDataMapper(DataMapper):
+    db_model = CartReservationOrm
+    schema = CartReservation
+
+
 class CartDataMapper(DataMapper):
     db_model = CartOrm
     schema = Cart
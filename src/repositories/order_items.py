@@ -1,5 +1,6 @@
 from sqlalchemy import select
 
+from src.exceptions.exception import ObjectNotFoundException
 from src.repositories.base import BaseRepository
 from src.models.order_items import OrderItemOrm
 from src.repositories.mappers.mappers import OrderItemDataMapper
@@ -17,3 +18,16 @@ class OrderItemsRepository(BaseRepository):
         result = await self.session.execute(query)
         models = result.scalars().all()
         return [self.mapper.map_to_domain_entity(model) for model in models]
+
+    async def lock_one(self, item_id: int):
+        """Позиция под FOR UPDATE: количество для расчета разниц остатка и
+        суммы заказа читается в той же транзакции, что и изменение"""
+        query = select(self.model).filter_by(id=item_id).with_for_update()
+        result = await self.session.execute(query)
+        model = result.scalars().one_or_none()
+        if model is None:
+            raise ObjectNotFoundException
+        return self.mapper.map_to_domain_entity(model)
+
+    async def delete_by_order_ids(self, order_ids: list[int]) -> None:
+        await self.delete(self.model.order_id.in_(order_ids))
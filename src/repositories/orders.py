@@ -1,8 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
 from src.repositories.base import BaseRepository
-from src.models.orders import OrderOrm
+from src.models.order_items import OrderItemOrm
+from src.models.orders import OrderOrm, order_number_seq
 from src.repositories.mappers.mappers import OrderDataMapper
 
 
 class OrdersRepository(BaseRepository):
     model = OrderOrm
     mapper = OrderDataMapper
+
+    async def cancel_stale_pending(self, created_before: datetime, limit: int):
+        """Отменяет пачку неоплаченных заказов старше created_before.
+
+        SKIP LOCKED: заказы, которые прямо сейчас меняет пользователь
+        (пользовательские пути берут строку заказа FOR UPDATE) или другой
+        воркер, пропускаются до следующего запуска.
+        """
+        stale = (
+            select(self.model.id)
+            .where(
+                self.model.status == "pending",
+                self.model.created_at < created_before,
+            )
+            # Порядок частичного индекса ix_orders_pending_created_at_id:
+            # LIMIT дочитывает только старейшие неоплаченные заказы
+            .order_by(self.model.created_at, self.model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("stale")
+        )
+        stmt = (
+            update(self.model)
+            .where(self.model.id.in_(select(stale.c.id)))
+            .values(status="cancelled", updated_at=datetime.utcnow())
+            .returning(self.model)
+        )
+        result = await self.session.execute(stmt)
+        return [self.mapper.map_to_domain_entity(model) for model in result.scalars()]
+
+    async def delete_by_ids(self, order_ids: list[int]) -> None:
+        await self.delete(self.model.id.in_(order_ids))
+
+    async def next_order_number(self) -> int:
+        result = await self.session.execute(select(order_number_seq.next_value()))
+        return result.scalar_one()
+
+    async def add_to_total(self, order_id: int, delta: float) -> float:
+        """Сдвигает сумму заказа на delta в самой базе, возвращает новую сумму"""
+        stmt = (
+            update(self.model)
+            .where(self.model.id == order_id)
+            .values(total_amount=self.model.total_amount + delta)
+            .returning(self.model.total_amount)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    async def recalculate_total(self, order_id: int) -> float:
+        """Пересчитывает сумму заказа агрегатом SUM в одном UPDATE"""
+        items_total = (
+            select(
+                func.coalesce(
+                    func.sum(OrderItemOrm.final_price * OrderItemOrm.quantity), 0
+                )
+            )
+            .where(OrderItemOrm.order_id == order_id)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(self.model)
+            .where(self.model.id == order_id)
+            .values(total_amount=items_total)
+            .returning(self.model.total_amount)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
@@ -1,37 +1,260 @@
-from sqlalchemy import select, func
+from typing import Any
+
+from sqlalchemy import Integer, column, select, func, or_, tuple_, update, values
 
 from src.repositories.base import BaseRepository
+from src.repositories.cart_reservations import CartReservationsRepository
+from src.models.cart_items import CartItemOrm
+from src.models.order_items import OrderItemOrm
+from src.models.orders import OrderOrm
 from src.models.products import ProductOrm
 from src.repositories.mappers.mappers import ProductDataMapper
+from src.repositories.utils import escape_like
 
 
 class ProductsRepository(BaseRepository):
     model = ProductOrm
     mapper = ProductDataMapper
 
-    async def get_search_by_name(
+    @staticmethod
+    def _search_condition(column, term: str):
+        """Подстрока (ILIKE) или похожее слово с опечаткой (pg_trgm %>).
+
+        Оба условия обслуживаются триграммным GIN-индексом колонки.
+        """
+        return or_(
+            column.ilike(f"%{escape_like(term)}%", escape="\\"),
+            column.op("%>")(term),
+        )
+
+    def _search_query(
         self,
         name: str | None = None,
         description: str | None = None,
         product_type: str | None = None,
-        limit: int = 5,
-        offset: int = 0,
     ):
+        """Запрос с фильтрами поиска и выражение релевантности (или None)"""
         query = select(ProductOrm)
+        relevance = []
         if name:
-            name_lower = name.strip().lower()
-            query = query.filter(func.lower(ProductOrm.name).like(f"%{name_lower}%"))
+            name_term = name.strip().lower()
+            query = query.filter(self._search_condition(ProductOrm.name, name_term))
+            # Совпадение в названии весит больше, чем в описании
+            relevance.append(2 * func.word_similarity(name_term, ProductOrm.name))
 
         if description:
-            description_lower = description.strip().lower()
+            description_term = description.strip().lower()
             query = query.filter(
-                func.lower(ProductOrm.description).like(f"%{description_lower}%")
+                self._search_condition(ProductOrm.description, description_term)
+            )
+            relevance.append(
+                func.word_similarity(description_term, ProductOrm.description)
             )
 
         if product_type:
             query = query.filter(ProductOrm.product_type == product_type.strip())
 
+        return query, sum(relevance) if relevance else None
+
+    async def get_search_by_name(
+        self,
+        name: str | None = None,
+        description: str | None = None,
+        product_type: str | None = None,
+        limit: int = 5,
+        offset: int = 0,
+        sort_by: str | None = None,
+        descending: bool = False,
+    ):
+        query, relevance = self._search_query(name, description, product_type)
+        if sort_by is not None:
+            query = query.order_by(*self._sort_columns(sort_by, descending))
+        elif relevance is not None:
+            query = query.order_by(relevance.desc(), ProductOrm.id)
+        else:
+            query = query.order_by(ProductOrm.id)
+
         query = query.limit(limit).offset(offset)
         result = await self.session.execute(query)
         products = result.scalars().all()
         return [self.mapper.map_to_domain_entity(model) for model in products]
+
+    async def get_page_after(
+        self,
+        name: str | None = None,
+        description: str | None = None,
+        product_type: str | None = None,
+        limit: int = 5,
+        sort_by: str = "id",
+        descending: bool = False,
+        after: tuple[Any, int] | None = None,
+    ):
+        """Keyset-пагинация: строки строго после (sort_key, id) последней выдачи.
+
+        В отличие от OFFSET, глубина страницы не влияет на стоимость запроса.
+        """
+        query, _ = self._search_query(name, description, product_type)
+        if after is not None:
+            sort_key, last_id = after
+            if sort_by == "id":
+                position, bound = ProductOrm.id, last_id
+            else:
+                position = tuple_(getattr(ProductOrm, sort_by), ProductOrm.id)
+                bound = tuple_(sort_key, last_id)
+            query = query.filter(position < bound if descending else position > bound)
+
+        query = query.order_by(*self._sort_columns(sort_by, descending)).limit(limit)
+        result = await self.session.execute(query)
+        products = result.scalars().all()
+        return [self.mapper.map_to_domain_entity(model) for model in products]
+
+    async def get_cart_products(self, cart_id: int):
+        """Товары корзины с ценой и количеством одним запросом.
+
+        Позиции корзины блокируются до конца транзакции оформления:
+        параллельное изменение количества подождет, и заказ соберется ровно
+        из того, что списано со склада. Строки товаров здесь не блокируются -
+        это делает lock_stock в порядке id.
+        """
+        query = (
+            select(
+                ProductOrm.id,
+                ProductOrm.name,
+                ProductOrm.price,
+                CartItemOrm.quantity,
+                CartItemOrm.id.label("cart_item_id"),
+            )
+            .join(CartItemOrm, CartItemOrm.product_id == ProductOrm.id)
+            .where(CartItemOrm.cart_id == cart_id)
+            .order_by(ProductOrm.id)
+            .with_for_update(of=CartItemOrm)
+        )
+        result = await self.session.execute(query)
+        return result.all()
+
+    async def get_stock_quantities(self, product_ids: list[int]) -> dict[int, int]:
+        query = select(ProductOrm.id, ProductOrm.stock_quantity).where(
+            ProductOrm.id.in_(product_ids)
+        )
+        result = await self.session.execute(query)
+        return {row.id: row.stock_quantity for row in result.all()}
+
+    async def lock_stock(self, product_ids: list[int], exclude_cart_id=None):
+        """Блокирует строки товаров в порядке id и возвращает их остатки.
+
+        Единый порядок блокировок для всех транзакций исключает взаимные
+        блокировки между параллельными оформлениями заказов. available -
+        остаток за вычетом активных резервов корзин, кроме exclude_cart_id.
+        """
+        held = CartReservationsRepository.held_quantity(ProductOrm.id, exclude_cart_id)
+        query = (
+            select(
+                ProductOrm.id,
+                ProductOrm.name,
+                ProductOrm.stock_quantity,
+                (ProductOrm.stock_quantity - held).label("available"),
+            )
+            .where(ProductOrm.id.in_(product_ids))
+            .order_by(ProductOrm.id)
+            .with_for_update(of=ProductOrm)
+        )
+        result = await self.session.execute(query)
+        return result.all()
+
+    async def decrement_stock(
+        self, quantities: dict[int, int], exclude_cart_id=None
+    ) -> list[int]:
+        """Списывает остатки, только если их хватает с учетом резервов
+        других корзин (кроме exclude_cart_id); возвращает id списанных"""
+        changes = self._stock_changes(quantities)
+        held = CartReservationsRepository.held_quantity(ProductOrm.id, exclude_cart_id)
+        stmt = (
+            update(ProductOrm)
+            .values(stock_quantity=ProductOrm.stock_quantity - changes.c.quantity)
+            .where(
+                ProductOrm.id == changes.c.product_id,
+                ProductOrm.stock_quantity - held >= changes.c.quantity,
+            )
+            .returning(ProductOrm.id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def increment_stock(self, quantities: dict[int, int]) -> list[int]:
+        changes = self._stock_changes(quantities)
+        stmt = (
+            update(ProductOrm)
+            .values(stock_quantity=ProductOrm.stock_quantity + changes.c.quantity)
+            .where(ProductOrm.id == changes.c.product_id)
+            .returning(ProductOrm.id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def lock_stock_for_orders(
+        self, order_ids: list[int], status: str | None = None
+    ) -> None:
+        """Блокирует товары заказов в порядке id (как и lock_stock)"""
+        order_products = self._order_items_query(
+            select(OrderItemOrm.product_id), order_ids, status
+        )
+        query = (
+            select(ProductOrm.id)
+            .where(ProductOrm.id.in_(order_products))
+            .order_by(ProductOrm.id)
+            .with_for_update()
+        )
+        await self.session.execute(query)
+
+    async def restock_from_orders(
+        self, order_ids: list[int], status: str | None = None
+    ) -> list[int]:
+        """Возвращает на склад позиции заказов одним UPDATE ... FROM.
+
+        status - вернуть только позиции заказов в этом статусе.
+        """
+        returned = (
+            self._order_items_query(
+                select(
+                    OrderItemOrm.product_id,
+                    func.sum(OrderItemOrm.quantity).label("quantity"),
+                ),
+                order_ids,
+                status,
+            )
+            .group_by(OrderItemOrm.product_id)
+            .subquery("returned")
+        )
+        stmt = (
+            update(ProductOrm)
+            .values(stock_quantity=ProductOrm.stock_quantity + returned.c.quantity)
+            .where(ProductOrm.id == returned.c.product_id)
+            .returning(ProductOrm.id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _order_items_query(query, order_ids: list[int], status: str | None):
+        query = query.where(OrderItemOrm.order_id.in_(order_ids))
+        if status is not None:
+            query = query.join(OrderOrm, OrderOrm.id == OrderItemOrm.order_id).where(
+                OrderOrm.status == status
+            )
+        return query
+
+    @staticmethod
+    def _stock_changes(quantities: dict[int, int]):
+        return values(
+            column("product_id", Integer),
+            column("quantity", Integer),
+            name="stock_changes",
+        ).data(sorted(quantities.items()))
+
+    @staticmethod
+    def _sort_columns(sort_by: str, descending: bool) -> list:
+        columns = [getattr(ProductOrm, sort_by)]
+        if sort_by != "id":
+            # id делает порядок однозначным при равных значениях ключа
+            columns.append(ProductOrm.id)
+        return [column.desc() if descending else column.asc() for column in columns]
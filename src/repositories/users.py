@@ -16,6 +16,9 @@ class UsersRepository(BaseRepository):
     model = UserOrm
     mapper = UserDataMapper
 
+    async def get_by_ids(self, user_ids: list[int]):
+        return await self.get_filtered(UserOrm.id.in_(user_ids))
+
     async def get_with_hashed_password(self, email: EmailStr):
         query = select(UserOrm).filter_by(email=email)
         result = await self.session.execute(query)
@@ -25,14 +28,14 @@ class UsersRepository(BaseRepository):
             raise EmailNotRegisteredException
         return UserWithHashedPassword.model_validate(model, from_attributes=True)
 
-    async def get_current_user_role_for_permissions(self, user_id: int) -> dict:
+    async def get_user_role_with_permissions(self, user_id: int) -> tuple[int, dict]:
         query = (
-            select(RoleOrm.permissions)
+            select(RoleOrm.id, RoleOrm.permissions)
             .join(UserOrm, UserOrm.role_id == RoleOrm.id)
             .filter(UserOrm.id == user_id)
         )
         result = await self.session.execute(query)
-        permissions = result.scalar_one_or_none()
-        if permissions is None:
+        row = result.one_or_none()
+        if row is None:
             raise UserRoleNotAssignedException
-        return permissions or {}
+        return row.id, row.permissions or {}
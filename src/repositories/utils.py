@@ -1,10 +1,14 @@
 from datetime import datetime
+import base64
+import binascii
+import json
 import uuid
 from pathlib import Path
 import aiofiles
 from fastapi import UploadFile
-from sqlalchemy import func, select, update
+from sqlalchemy import func, select
 
+from src.exceptions.exception import InvalidCursorException
 from src.exceptions.upload import (
     InvalidFileExtensionHTTPException,
     FileTooLargeHTTPException,
@@ -13,39 +17,22 @@ from src.exceptions.upload import (
 )
 from src.models import CartOrm
 from src.models.cart_items import CartItemOrm
+from src.models.cart_reservations import CartReservationOrm
 from src.models.products import ProductOrm
 
 
-def get_update_stock_for_cart_query(user_id: int):
-    """Обновления остатков товаров в корзине"""
-    cart_subquery = (
-        select(CartOrm.id).where(CartOrm.user_id == user_id).scalar_subquery()
-    )
-
-    cart_items_cte = (
-        select(
-            CartItemOrm.product_id,
-            CartItemOrm.quantity,
-        )
-        .join(ProductOrm, ProductOrm.id == CartItemOrm.product_id)
+def check_product_availability_and_calculate_simple(user_id: int):
+    # Активные резервы других корзин на тот же товар
+    reserved_by_others = (
+        select(func.coalesce(func.sum(CartReservationOrm.quantity), 0))
         .where(
-            CartItemOrm.cart_id == cart_subquery,
-            ProductOrm.stock_quantity >= CartItemOrm.quantity,
+            CartReservationOrm.product_id == CartItemOrm.product_id,
+            CartReservationOrm.expires_at > datetime.utcnow(),
+            CartReservationOrm.cart_id != CartItemOrm.cart_id,
         )
-        .cte("cart_items_cte")
-    )
-
-    update_stmt = (
-        update(ProductOrm)
-        .values(stock_quantity=ProductOrm.stock_quantity - cart_items_cte.c.quantity)
-        .where(ProductOrm.id == cart_items_cte.c.product_id)
-        .returning(ProductOrm.id)
+        .correlate(CartItemOrm)
+        .scalar_subquery()
     )
-
-    return update_stmt
-
-
-def check_product_availability_and_calculate_simple(user_id: int):
     cart_query = (
         select(
             CartItemOrm.product_id,
@@ -53,7 +40,9 @@ def check_product_availability_and_calculate_simple(user_id: int):
             ProductOrm.price,
             ProductOrm.stock_quantity,
             ProductOrm.name,
-            (ProductOrm.stock_quantity >= CartItemOrm.quantity).label("available"),
+            (
+                ProductOrm.stock_quantity - reserved_by_others >= CartItemOrm.quantity
+            ).label("available"),
         )
         .join(ProductOrm, ProductOrm.id == CartItemOrm.product_id)
         .join(CartOrm, CartOrm.id == CartItemOrm.cart_id)
@@ -70,6 +59,28 @@ def check_product_availability_and_calculate_simple(user_id: int):
     return summary_query
 
 
+def escape_like(value: str) -> str:
+    """Экранирует спецсимволы шаблона LIKE в пользовательском вводе"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_cursor(payload: dict) -> str:
+    """Непрозрачный курсор keyset-пагинации"""
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data)
+    except (binascii.Error, ValueError):
+        raise InvalidCursorException
+    if not isinstance(payload, dict):
+        raise InvalidCursorException
+    return payload
+
+
 def generate_sku(product_type: str, brand_id: int, category_id: int) -> str:
     # Пример: CLOTH-NIKE-123-20241217-ABC123
     timestamp = datetime.now().strftime("%Y%m%d")
@@ -77,9 +88,10 @@ def generate_sku(product_type: str, brand_id: int, category_id: int) -> str:
     return f"{product_type[:5].upper()}-{brand_id}-{category_id}-{timestamp}-{unique}"
 
 
-def generate_order_number(user_id: int) -> str:
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    return f"ORD-{timestamp}-{user_id:06d}"
+def generate_order_number(sequence_value: int) -> str:
+    # Пример: ORD-20241217-00001234. Уникальность дает последовательность БД
+    date = datetime.now().strftime("%Y%m%d")
+    return f"ORD-{date}-{sequence_value:08d}"
 
 
 async def save_uploaded_files(
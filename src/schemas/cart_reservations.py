@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class CartReservationAdd(BaseModel):
+    cart_id: int
+    cart_item_id: int
+    product_id: int
+    quantity: int
+    expires_at: datetime
+
+
+class CartReservation(CartReservationAdd):
+    id: int
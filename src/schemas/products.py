@@ -51,6 +51,17 @@ class Product(ProductsAdd):
     id: int
 
 
+class ProductSortField(str, Enum):
+    ID = "id"
+    PRICE = "price"
+    CREATED_AT = "created_at"
+
+
+class ProductsPage(BaseModel):
+    items: list[Product]
+    next_cursor: str | None = None
+
+
 class ProductImagesUpdate(BaseModel):
     images: list[str]
 
@@ -25,6 +25,10 @@ class UserAdd(BaseModel):
     created_at: datetime
 
 
+class UserPasswordUpdate(BaseModel):
+    hashed_password: str
+
+
 class UserMeResponse(BaseModel):
     id: int
     role_id: int
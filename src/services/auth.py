@@ -1,9 +1,15 @@
-from passlib.context import CryptContext
+import hashlib
+import time
 import jwt
 from datetime import datetime, timedelta, timezone
 
 from src.config import settings
-from src.core.permissions import Permission
+from src.init import permission_cache, token_cache, password_hasher
+from src.core.permissions import (
+    Permission,
+    permissions_to_mask,
+    mask_to_permissions,
+)
 from src.exceptions.exception import (
     ObjectAlreadyExistsException,
     UserAlreadyExistsException,
@@ -15,19 +21,24 @@ from src.exceptions.exception import (
     TokenExpiredHTTPException,
     IncorrectTokenHTTPException,
     WrongTokenTypeHTTPException,
+    TokenPermissionsOutdatedHTTPException,
     ObjectNotFoundException,
     PermissionDeniedHTTPException,
     CannotDeleteSelfHTTPException,
     UserNotFoundHTTPException,
 )
-from src.schemas.users import UserAddRequest, UserAdd, UserLogin, UserUpdate
+from src.schemas.users import (
+    UserAddRequest,
+    UserAdd,
+    UserLogin,
+    UserUpdate,
+    UserPasswordUpdate,
+)
 from src.services.base import BaseService
 from src.services.roles import RoleService
 
 
 class AuthService(BaseService):
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
     async def get_me(self, user_id: int):
         user = await self.db.users.get_one_or_none(id=user_id)
         return {
@@ -40,7 +51,7 @@ class AuthService(BaseService):
 
     async def register_user(self, data: UserAddRequest, role_name: str = "user"):
         role = await RoleService(self.db).get_role_with_check(role_name)
-        hashed_password = AuthService().hashed_password(data.password)
+        hashed_password = await self.hashed_password(data.password)
         user_data = UserAdd(
             role_id=role.id,
             first_name=data.first_name,
@@ -59,14 +70,24 @@ class AuthService(BaseService):
         user = await self.db.users.get_with_hashed_password(email=data.email)
         if not user:
             raise EmailNotRegisteredException
-        if not self.verify_password(data.password, user.hashed_password):
+        is_valid, new_hash = await password_hasher.verify_and_update(
+            data.password, user.hashed_password
+        )
+        if not is_valid:
             raise IncorrectPasswordException
+        if new_hash:
+            # Стоимость хеширования изменилась - сохраняем пароль с новой
+            await self.db.users.exit(
+                UserPasswordUpdate(hashed_password=new_hash), id=user.id
+            )
+            await self.db.commit()
         tokens = self.create_tokens_pair(
             {
                 "user_id": user.id,
                 "role_id": user.role_id,
                 "email": user.email,
-            }
+            },
+            access_claims=await self.get_permission_claims(user.id, user.role_id),
         )
         return tokens
 
@@ -78,15 +99,65 @@ class AuthService(BaseService):
                 "user_id": user.id,
                 "role_id": user.role_id,
                 "email": user.email,
-            }
+            },
+            access_claims=await self.get_permission_claims(user.id, user.role_id),
         )
 
     async def get_user_permissions(self, user_id: int):
         try:
-            return await self.db.users.get_current_user_role_for_permissions(user_id)
+            return await permission_cache.get_user_permissions(
+                user_id,
+                load_user_role=self._load_user_role,
+                load_role=self._load_role_permissions,
+            )
         except UserRoleNotAssignedException:
             raise UserRoleNotAssignedHTTPException
 
+    async def get_permission_claims(self, user_id: int, role_id: int) -> dict:
+        """Маска прав и версия роли для access-токена"""
+        if not settings.JWT_EMBED_PERMISSIONS:
+            return {}
+        permissions = await self.get_user_permissions(user_id)
+        role_version = await permission_cache.get_role_version(
+            role_id, self._load_role_permissions
+        )
+        return {"perms": permissions_to_mask(permissions), "role_ver": role_version}
+
+    async def get_permissions_from_token(self, payload: dict) -> dict:
+        """Права из маски токена; без маски - через кеш прав"""
+        mask = payload.get("perms")
+        if mask is None or not settings.JWT_EMBED_PERMISSIONS:
+            return await self.get_user_permissions(payload["user_id"])
+        # Роль пользователя могли сменить после выдачи токена: маска старой
+        # роли тогда не действует, даже если сама роль не менялась
+        try:
+            role_id = await permission_cache.get_user_role_id(
+                payload["user_id"], self._load_user_role
+            )
+        except UserRoleNotAssignedException:
+            raise UserRoleNotAssignedHTTPException
+        if role_id != payload["role_id"]:
+            raise TokenPermissionsOutdatedHTTPException
+        role_version = await permission_cache.get_role_version(
+            role_id, self._load_role_permissions
+        )
+        if payload.get("role_ver") != role_version:
+            raise TokenPermissionsOutdatedHTTPException
+        return mask_to_permissions(mask)
+
+    # Загрузчики кеша прав читают основную БД: реплика сразу после смены
+    # роли вернула бы старые права, и они снова легли бы в кеш
+    async def _load_user_role(self, user_id: int) -> tuple[int, dict]:
+        await self.db.use_primary()
+        return await self.db.users.get_user_role_with_permissions(user_id)
+
+    async def _load_role_permissions(self, role_id: int) -> dict:
+        await self.db.use_primary()
+        role = await self.db.roles.get_one_or_none(id=role_id)
+        if role is None:
+            raise UserRoleNotAssignedException
+        return role.permissions or {}
+
     async def get_user_with_check(self, user_id: int):
         try:
             return await self.db.users.get_one(id=user_id)
@@ -97,16 +168,12 @@ class AuthService(BaseService):
         # Проверяем что пользователь существует
         await self.get_user_with_check(user_id)
         if user_id != current_user_id:
-            permissions = await self.db.users.get_current_user_role_for_permissions(
-                current_user_id
-            )
+            permissions = await self.get_user_permissions(current_user_id)
             if Permission.EDIT_USERS.value not in permissions:
                 raise PermissionDeniedHTTPException(Permission.EDIT_USERS.value)
 
         if data.role_id is not None:
-            permissions = await self.db.users.get_current_user_role_for_permissions(
-                current_user_id
-            )
+            permissions = await self.get_user_permissions(current_user_id)
             if Permission.EDIT_USERS.value not in permissions:
                 raise PermissionDeniedHTTPException(Permission.EDIT_USERS.value)
 
@@ -116,13 +183,13 @@ class AuthService(BaseService):
             raise RoleNotExistsException
         await self.db.users.exit(data, exclude_unset=True, id=user_id)
         await self.db.commit()
+        if data.role_id is not None:
+            await permission_cache.invalidate_user(user_id)
 
     async def delete_user(self, user_id: int, current_user_id: int):
         if user_id == current_user_id:
             raise CannotDeleteSelfHTTPException
-        permissions = await self.db.users.get_current_user_role_for_permissions(
-            current_user_id
-        )
+        permissions = await self.get_user_permissions(current_user_id)
         if Permission.DELETE_USERS.value not in permissions:
             raise PermissionDeniedHTTPException(Permission.DELETE_USERS.value)
         await self.get_user_with_check(user_id)
@@ -145,6 +212,7 @@ class AuthService(BaseService):
         # 5. Удалить пользователя
         await self.db.users.delete(id=user_id)
         await self.db.commit()
+        await permission_cache.invalidate_user(user_id)
 
     def create_access_token(self, data: dict):
         to_encode = data.copy()
@@ -167,9 +235,9 @@ class AuthService(BaseService):
             to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
         )
 
-    def create_tokens_pair(self, data: dict):
+    def create_tokens_pair(self, data: dict, access_claims: dict | None = None):
         """Создает пару access + refresh токенов"""
-        access_token = self.create_access_token(data)
+        access_token = self.create_access_token({**data, **(access_claims or {})})
         refresh_token = self.create_refresh_token(data)
         return {"access_token": access_token, "refresh_token": refresh_token}
 
@@ -180,18 +248,30 @@ class AuthService(BaseService):
             raise WrongTokenTypeHTTPException
         return payload
 
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password, hashed_password) -> bool:
+        is_valid, _ = await password_hasher.verify_and_update(
+            plain_password, hashed_password
+        )
+        return is_valid
 
-    def hashed_password(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def hashed_password(self, password: str) -> str:
+        return await password_hasher.hash(password)
 
     def decode_token(self, token: str) -> dict:
+        # Подпись проверяем один раз: дальше до exp отдаем payload из кеша
+        token_hash = hashlib.sha256(token.encode()).digest()
+        payload = token_cache.get(token_hash)
+        if payload is not None:
+            return payload
         try:
-            return jwt.decode(
+            payload = jwt.decode(
                 token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
             )
         except jwt.ExpiredSignatureError:
             raise TokenExpiredHTTPException
         except jwt.DecodeError:
             raise IncorrectTokenHTTPException
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_cache.set(token_hash, payload, ttl=ttl)
+        return payload
@@ -4,7 +4,9 @@ from src.exceptions.exception import (
     CannotRemoveBrandHTTPException,
 )
 from src.schemas.brands import BrandsAdd, BrandsPatch
+from src.init import reference_cache
 from src.services.base import BaseService
+from src.utils.http_cache import invalidate_cache_tags
 
 
 class BrandService(BaseService):
@@ -17,26 +19,42 @@ class BrandService(BaseService):
     async def add_brand(self, data: BrandsAdd):
         brand = await self.db.brands.add(data)
         await self.db.commit()
+        await reference_cache.invalidate("brands")
+        await invalidate_cache_tags("brands")
         return brand
 
     async def update_brand(
         self, data: BrandsPatch, brand_id: int, exclude_unset: bool = False
     ):
-        await self.get_brand_with_check(brand_id)
+        await self.lock_brand_with_check(brand_id)
         await self.db.brands.exit(data, exclude_unset=exclude_unset, id=brand_id)
         await self.db.commit()
+        await reference_cache.invalidate("brands")
+        await invalidate_cache_tags("brands", f"brand:{brand_id}")
 
     async def delete_brand(self, brand_id: int):
-        brand = await self.get_brand_with_check(brand_id)
+        brand = await self.lock_brand_with_check(brand_id)
         products = await self.db.products.get_filtered(brand_id=brand_id)
         if products:
             product_ids = [p.id for p in products]
             raise CannotRemoveBrandHTTPException(brand.name, product_ids)
         await self.db.brands.delete(id=brand_id)
         await self.db.commit()
+        await reference_cache.invalidate("brands")
+        await invalidate_cache_tags("brands", f"brand:{brand_id}")
 
     async def get_brand_with_check(self, brand_id: int):
+        """Проверка существования по снимку воркера - только для чтения"""
+        brand = reference_cache.get_brand(brand_id)
+        if brand is not None:
+            return brand
         try:
             return await self.db.brands.get_one(id=brand_id)
         except ObjectNotFoundException:
             raise BrandNotFoundException
+
+    async def lock_brand_with_check(self, brand_id: int):
+        try:
+            return await self.db.brands.get_one_for_update(id=brand_id)
+        except ObjectNotFoundException:
+            raise BrandNotFoundException
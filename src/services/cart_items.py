@@ -1,12 +1,24 @@
+from datetime import datetime, timedelta
+
+from src.config import settings
 from src.core.permissions import Permission
 from src.exceptions.exception import (
     PermissionDeniedHTTPException,
     ObjectNotFoundException,
     CartItemNotFoundException,
     NotAllProductsAvailableHTTPException,
+    ProductSoldOutException,
+    ProductSoldOutHTTPException,
 )
+from src.init import stock_gate
 from src.repositories.utils import check_product_availability_and_calculate_simple
-from src.schemas.cart_items import CartItemsAdd, CartItemsAddRequest, CartItemsUpdate
+from src.schemas.cart_items import (
+    CartItem,
+    CartItemsAdd,
+    CartItemsAddRequest,
+    CartItemsUpdate,
+)
+from src.schemas.cart_reservations import CartReservationAdd
 from src.services.auth import AuthService
 from src.services.base import BaseService
 from src.services.carts import CartService
@@ -38,6 +50,12 @@ class CartItemService(BaseService):
     async def add_cart_item(
         self, product_id: int, user_id: int, data: CartItemsAddRequest
     ):
+        # Распроданный товар шлюза отклоняем, не обращаясь к БД
+        try:
+            await stock_gate.check({product_id: data.quantity})
+        except ProductSoldOutException as e:
+            raise ProductSoldOutHTTPException(e.product_id)
+
         cart = await self.db.carts.get_one_or_none(user_id=user_id)
         if not cart:
             cart = await CartService(self.db).add_cart(user_id)
@@ -49,15 +67,8 @@ class CartItemService(BaseService):
         )
         cart_item = await self.db.cart_items.add(cart_item_data)
 
-        # 2. Потом проверяем всю корзину
-        query = check_product_availability_and_calculate_simple(user_id)
-        result = await self.db.session.execute(query)
-        summary = result.first()
-
-        # 3. Если что-то недоступно - откатываем добавление
-        if summary.available_items < summary.total_items:
-            await self.db.rollback()
-            raise NotAllProductsAvailableHTTPException()
+        # 2. Резерв и проверка всей корзины под блокировкой товара
+        await self.hold_cart_item_checked(cart_item, user_id)
 
         await self.db.commit()
         return cart_item
@@ -79,6 +90,9 @@ class CartItemService(BaseService):
                 raise PermissionDeniedHTTPException(Permission.VIEW_USERS.value)
 
         await self.db.cart_items.exit(data, exclude_unset=exclude_unset, id=item_id)
+        if data.quantity is not None:
+            updated_item = item.model_copy(update={"quantity": data.quantity})
+            await self.hold_cart_item_checked(updated_item, cart.user_id)
         await self.db.commit()
 
     async def delete_cart_item(self, item_id: int, user_id: int):
@@ -93,6 +107,48 @@ class CartItemService(BaseService):
         await self.db.cart_items.delete(id=item_id)
         await self.db.commit()
 
+    async def hold_cart_item(self, cart_item: CartItem) -> None:
+        """Резерв товара под позицию корзины на CART_RESERVATION_TTL_MINUTES.
+
+        Резерв не списывает остаток, а уменьшает доступное другим корзинам;
+        удаляется вместе с позицией, истекшие чистит периодическая задача.
+        """
+        expires_at = datetime.utcnow() + timedelta(
+            minutes=settings.CART_RESERVATION_TTL_MINUTES
+        )
+        await self.db.cart_reservations.hold(
+            CartReservationAdd(
+                cart_id=cart_item.cart_id,
+                cart_item_id=cart_item.id,
+                product_id=cart_item.product_id,
+                quantity=cart_item.quantity,
+                expires_at=expires_at,
+            )
+        )
+
+    async def hold_cart_item_checked(self, cart_item: CartItem, user_id: int) -> None:
+        """Резерв позиции с проверкой доступности всей корзины пользователя.
+
+        Строка товара блокируется до проверки: параллельные добавления того
+        же товара в разные корзины проверяются по очереди и не резервируют
+        больше остатка. При нехватке транзакция откатывается.
+        """
+        await self.db.products.lock_stock([cart_item.product_id])
+        await self.hold_cart_item(cart_item)
+
+        # Проверяем всю корзину с учетом резервов других корзин
+        query = check_product_availability_and_calculate_simple(user_id)
+        result = await self.db.session.execute(query)
+        summary = result.first()
+        if summary.available_items < summary.total_items:
+            await self.db.rollback()
+            raise NotAllProductsAvailableHTTPException()
+
+    async def release_expired_reservations(self) -> int:
+        released = await self.db.cart_reservations.delete_expired(datetime.utcnow())
+        await self.db.commit()
+        return released
+
     async def get_cart_item_with_check(self, item_id: int):
         try:
             return await self.db.cart_items.get_one(id=item_id)
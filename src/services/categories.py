@@ -3,12 +3,22 @@ from src.exceptions.exception import (
     CategoryNotFoundException,
     CannotRemoveCategoryHTTPException,
 )
-from src.schemas.categories import CategoriesAdd, CategoriesPatch
+from src.config import settings
+from src.schemas.categories import CategoriesAdd, CategoriesPatch, Category
+from src.init import reference_cache, stampede_cache
 from src.services.base import BaseService
+from src.utils.http_cache import invalidate_cache_tags
+
+
+CATEGORIES_CACHE_KEY = "categories:list"
 
 
 class CategoryService(BaseService):
+    @stampede_cache.cached(
+        CATEGORIES_CACHE_KEY, schema=list[Category], ttl=settings.CATEGORIES_CACHE_TTL
+    )
     async def get_categories(self):
+        await self.db.use_primary()
         return await self.db.categories.get_all()
 
     async def get_category(self, category_id: int):
@@ -17,26 +27,45 @@ class CategoryService(BaseService):
     async def add_category(self, data: CategoriesAdd):
         category = await self.db.categories.add(data)
         await self.db.commit()
+        await reference_cache.invalidate("categories")
+        await stampede_cache.invalidate(CATEGORIES_CACHE_KEY)
+        await invalidate_cache_tags("categories")
         return category
 
     async def update_category(
         self, data: CategoriesPatch, category_id: int, exclude_unset: bool = False
     ):
-        await self.get_category_with_check(category_id)
+        await self.lock_category_with_check(category_id)
         await self.db.categories.exit(data, exclude_unset=exclude_unset, id=category_id)
         await self.db.commit()
+        await reference_cache.invalidate("categories")
+        await stampede_cache.invalidate(CATEGORIES_CACHE_KEY)
+        await invalidate_cache_tags("categories", f"category:{category_id}")
 
     async def delete_category(self, category_id: int):
-        category = await self.get_category_with_check(category_id)
+        category = await self.lock_category_with_check(category_id)
         products = await self.db.products.get_filtered(category_id=category_id)
         if products:
             product_ids = [p.id for p in products]
             raise CannotRemoveCategoryHTTPException(category.name, product_ids)
         await self.db.categories.delete(id=category_id)
         await self.db.commit()
+        await reference_cache.invalidate("categories")
+        await stampede_cache.invalidate(CATEGORIES_CACHE_KEY)
+        await invalidate_cache_tags("categories", f"category:{category_id}")
 
     async def get_category_with_check(self, category_id: int):
+        """Проверка существования по снимку воркера - только для чтения"""
+        category = reference_cache.get_category(category_id)
+        if category is not None:
+            return category
         try:
             return await self.db.categories.get_one(id=category_id)
         except ObjectNotFoundException:
             raise CategoryNotFoundException
+
+    async def lock_category_with_check(self, category_id: int):
+        try:
+            return await self.db.categories.get_one_for_update(id=category_id)
+        except ObjectNotFoundException:
+            raise CategoryNotFoundException
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.exc import DBAPIError
+
+from src.exceptions.exception import (
+    InsufficientStockException,
+    ProductNotFoundException,
+)
+from src.init import product_cache
+from src.services.base import BaseService
+from src.utils.http_cache import invalidate_cache_tags
+
+# serialization_failure и deadlock_detected - ошибки, которые лечатся повтором
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+class InventoryService(BaseService):
+    """Атомарное изменение остатков сразу нескольких товаров.
+
+    Остатки меняются условным UPDATE ... RETURNING в базе, а не
+    чтением-вычислением-записью в Python, поэтому параллельные заказы не
+    затирают изменения друг друга. Каждая операция идет в savepoint и
+    повторяется при deadlock/serialization failure.
+    """
+
+    max_retries = 3
+    retry_delay = 0.05
+
+    async def reserve(
+        self, quantities: dict[int, int], cart_id: int | None = None
+    ) -> None:
+        """Списать остатки: {product_id: количество}. Все или ничего.
+
+        Активные резервы корзин списать нельзя, кроме резервов корзины
+        cart_id - ее и оформляют в заказ.
+        """
+        quantities = {pid: qty for pid, qty in quantities.items() if qty}
+        if quantities:
+            await self._run_with_retry(self._reserve, (quantities, cart_id))
+
+    async def release(self, quantities: dict[int, int]) -> None:
+        """Вернуть остатки на склад: {product_id: количество}"""
+        quantities = {pid: qty for pid, qty in quantities.items() if qty}
+        if quantities:
+            await self._run_with_retry(self._release, quantities)
+
+    async def restock_orders(
+        self, order_ids: list[int], status: str | None = None
+    ) -> None:
+        """Вернуть на склад позиции заказов, не поднимая их в Python.
+
+        status - только заказы в этом статусе (например, еще не отмененные).
+        """
+        if order_ids:
+            await self._run_with_retry(self._restock_orders, (order_ids, status))
+
+    async def adjust(self, product_id: int, delta: int) -> None:
+        """Положительная дельта списывает остаток, отрицательная - возвращает"""
+        if delta > 0:
+            await self.reserve({product_id: delta})
+        elif delta < 0:
+            await self.release({product_id: -delta})
+
+    async def _reserve(self, reservation: tuple[dict[int, int], int | None]) -> None:
+        quantities, cart_id = reservation
+        products = await self.db.products.lock_stock(list(quantities), cart_id)
+        if len(products) != len(quantities):
+            raise ProductNotFoundException
+        updated = set(await self.db.products.decrement_stock(quantities, cart_id))
+        for product in products:
+            if product.id not in updated:
+                raise InsufficientStockException(
+                    product.id, product.name, max(product.available, 0)
+                )
+        self._invalidate_after_commit(updated)
+
+    async def _release(self, quantities: dict[int, int]) -> None:
+        await self.db.products.lock_stock(list(quantities))
+        updated = await self.db.products.increment_stock(quantities)
+        self._invalidate_after_commit(updated)
+
+    async def _restock_orders(self, orders: tuple[list[int], str | None]) -> None:
+        order_ids, status = orders
+        await self.db.products.lock_stock_for_orders(order_ids, status)
+        updated = await self.db.products.restock_from_orders(order_ids, status)
+        self._invalidate_after_commit(updated)
+
+    def _invalidate_after_commit(self, product_ids) -> None:
+        # Остаток входит в кешированную карточку товара и в список товаров,
+        # а смена версии тега "products" меняет ETag списка
+        if product_ids:
+            product_ids = list(product_ids)
+            self.db.after_commit(lambda: product_cache.invalidate(*product_ids))
+            self.db.after_commit(lambda: invalidate_cache_tags("products"))
+
+    async def _run_with_retry(
+        self, operation: Callable[[Any], Awaitable[None]], argument: Any
+    ) -> None:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                # Откат savepoint снимает частичное списание и блокировки попытки
+                async with self.db.session.begin_nested():
+                    await operation(argument)
+                return
+            except DBAPIError as e:
+                sqlstate = getattr(e.orig, "sqlstate", None)
+                if sqlstate not in RETRYABLE_SQLSTATES or attempt == self.max_retries:
+                    raise
+                logging.warning(
+                    f"Конфликт при изменении остатков ({sqlstate}), "
+                    f"попытка {attempt} из {self.max_retries}"
+                )
+                await asyncio.sleep(self.retry_delay * attempt)
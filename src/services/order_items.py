@@ -1,5 +1,3 @@
-from datetime import datetime
-
 from src.core.permissions import Permission
 from src.exceptions.exception import (
     PermissionDeniedHTTPException,
@@ -10,12 +8,12 @@ from src.exceptions.exception import (
     ProductAlreadyInOrderHTTPException,
     NotEnoughProductHTTPException,
     OrderCannotDeletedHTTPException,
+    InsufficientStockException,
 )
 from src.schemas.order_items import OrderItemsAdd, OrderItemsAddRequest, OrderItemUpdate
-from src.schemas.orders import OrdersUpdate
-from src.schemas.products import ProductUpdate
 from src.services.auth import AuthService
 from src.services.base import BaseService
+from src.services.inventory import InventoryService
 from src.services.orders import OrderService
 from src.services.products import ProductService
 
@@ -47,7 +45,7 @@ class OrderItemService(BaseService):
         self, order_id: int, items: list[OrderItemsAddRequest], user_id: int
     ):
         """Добавить товары в существующий заказ"""
-        order = await OrderService(self.db).get_order_with_check(order_id)
+        order = await OrderService(self.db).lock_order_with_check(order_id)
 
         if order.status != "pending":
             raise OrderCannotModifiedHTTPException(order.status)
@@ -58,53 +56,48 @@ class OrderItemService(BaseService):
                 raise PermissionDeniedHTTPException(Permission.VIEW_USERS.value)
 
         added_items = []
+        quantities = {}
         for item in items:
             product = await ProductService(self.db).get_product_with_check(
                 item.product_id
             )
 
-            # 1. Проверить наличие
-            if product.stock_quantity < item.quantity:
-                raise NotAllProductsAvailableHTTPException
-
-            # 2. Проверить, не добавлен ли уже этот товар в заказ
+            # 1. Проверить, не добавлен ли уже этот товар в заказ
             existing = await self.db.order_items.get_one_or_none(
                 order_id=order_id, product_id=item.product_id
             )
-            if existing is not None:
+            if existing is not None or product.id in quantities:
                 raise ProductAlreadyInOrderHTTPException(product.name)
-
-            # 3. Обновить остатки
-            update_data = ProductUpdate(
-                stock_quantity=product.stock_quantity - item.quantity,
-                updated_at=datetime.utcnow(),
-            )
-            await self.db.products.exit(update_data, id=product.id, exclude_unset=True)
-
-            # 4. Добавить в order_items
-            order_item = OrderItemsAdd(
-                order_id=order_id,
-                product_id=product.id,
-                quantity=item.quantity,
-                final_price=product.price,
+            quantities[product.id] = item.quantity
+
+            added_items.append(
+                OrderItemsAdd(
+                    order_id=order_id,
+                    product_id=product.id,
+                    quantity=item.quantity,
+                    final_price=product.price,
+                )
             )
+
+        # 2. Списать остатки всех товаров атомарно
+        try:
+            await InventoryService(self.db).reserve(quantities)
+        except InsufficientStockException:
+            await self.db.rollback()
+            raise NotAllProductsAvailableHTTPException
+
+        # 3. Добавить в order_items
+        for order_item in added_items:
             await self.db.order_items.add(order_item)
-            added_items.append(order_item)
 
-        # 5. Обновить сумму заказа
+        # 4. Обновить сумму заказа на сумму добавленного
         total = sum(item.final_price * item.quantity for item in added_items)
-        await self.db.orders.exit(
-            OrdersUpdate(
-                total_amount=order.total_amount + total,
-            ),
-            id=order_id,
-            exclude_unset=True,
-        )
+        new_total = await self.db.orders.add_to_total(order_id, total)
         await self.db.commit()
         return {
             "message": f"Добавлено {len(added_items)} товаров",
             "total_added": total,
-            "new_total": order.total_amount + total,
+            "new_total": new_total,
             "order_id": order_id,
         }
 
@@ -116,7 +109,7 @@ class OrderItemService(BaseService):
         exclude_unset: bool = False,
     ):
         item = await self.get_order_item_with_check(item_id)
-        order = await OrderService(self.db).get_order_with_check(item.order_id)
+        order = await OrderService(self.db).lock_order_with_check(item.order_id)
         if order.user_id != user_id:
             permissions = await AuthService(self.db).get_user_permissions(user_id)
             if Permission.VIEW_USERS.value not in permissions:
@@ -125,25 +118,25 @@ class OrderItemService(BaseService):
         if order.status != "pending":
             raise OrderCannotModifiedHTTPException
 
-        product = await ProductService(self.db).get_product_with_check(item.product_id)
-        if data.quantity > product.stock_quantity + item.quantity:
-            quantity = product.stock_quantity + item.quantity
-            raise NotEnoughProductHTTPException(product.name, quantity)
+        # Разницы считаем от заблокированной строки: параллельный PATCH или
+        # DELETE той же позиции дождется коммита и увидит новое количество
+        item = await self.lock_order_item_with_check(item_id)
+
+        # Изменить остаток на разницу количества
+        try:
+            await InventoryService(self.db).adjust(
+                item.product_id, data.quantity - item.quantity
+            )
+        except InsufficientStockException as e:
+            await self.db.rollback()
+            raise NotEnoughProductHTTPException(e.product, e.available + item.quantity)
 
         # Обновить item
         await self.db.order_items.exit(data, id=item_id, exclude_unset=exclude_unset)
 
-        # Обновить остатки
-        stock_change = item.quantity - data.quantity
-        if stock_change != 0:
-            update_data = ProductUpdate(
-                stock_quantity=product.stock_quantity + stock_change,
-                updated_at=datetime.utcnow(),
-            )
-            await self.db.products.exit(update_data, id=product.id, exclude_unset=True)
-
-        # Пересчитать сумму
-        await self.recalculate_order_total(order.id)
+        # Сдвинуть сумму заказа на изменение позиции
+        delta = (data.quantity - item.quantity) * item.final_price
+        await self.db.orders.add_to_total(order.id, delta)
         await self.db.commit()
 
         updated_item = await self.get_order_item_with_check(item_id)
@@ -151,7 +144,7 @@ class OrderItemService(BaseService):
 
     async def delete_order_item(self, item_id: int, user_id: int):
         item = await self.get_order_item_with_check(item_id)
-        order = await OrderService(self.db).get_order_with_check(item.order_id)
+        order = await OrderService(self.db).lock_order_with_check(item.order_id)
 
         if order.user_id != user_id:
             permissions = await AuthService(self.db).get_user_permissions(user_id)
@@ -161,31 +154,27 @@ class OrderItemService(BaseService):
         if order.status not in ["pending", "cancelled"]:
             raise OrderCannotDeletedHTTPException(order.status)
 
-        product = await ProductService(self.db).get_product_with_check(item.product_id)
-        update_data = ProductUpdate(
-            stock_quantity=product.stock_quantity + item.quantity,
-            updated_at=datetime.utcnow(),
-        )
-        await self.db.products.exit(update_data, id=product.id, exclude_unset=True)
+        item = await self.lock_order_item_with_check(item_id)
+        # У отмененного заказа остатки уже возвращены при отмене
+        if order.status == "pending":
+            await InventoryService(self.db).release({item.product_id: item.quantity})
         await self.db.order_items.delete(id=item_id)
-        await self.recalculate_order_total(order.id)
+        await self.db.orders.add_to_total(order.id, -item.quantity * item.final_price)
         await self.db.commit()
         return {"message": "Товар удален из заказа", "item_id": item_id}
 
-    async def recalculate_order_total(self, order_id: int):
-        """Пересчитать общую сумму заказа"""
-        # Получить все items заказа
-        items = await self.db.order_items.get_filtered(order_id=order_id)
-
-        # Посчитать сумму
-        total = sum(item.final_price * item.quantity for item in items)
-
-        # Обновить заказ
-        update_data = OrdersUpdate(total_amount=total)
-        await self.db.orders.exit(update_data, id=order_id, exclude_unset=True)
+    async def recalculate_order_total(self, order_id: int) -> float:
+        """Пересчитать общую сумму заказа с нуля (для исправления расхождений)"""
+        return await self.db.orders.recalculate_total(order_id)
 
     async def get_order_item_with_check(self, item_id: int):
         try:
             return await self.db.order_items.get_one(id=item_id)
         except ObjectNotFoundException:
             raise OrderItemNotFoundException
+
+    async def lock_order_item_with_check(self, item_id: int):
+        try:
+            return await self.db.order_items.lock_one(item_id)
+        except ObjectNotFoundException:
+            raise OrderItemNotFoundException
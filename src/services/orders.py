@@ -1,12 +1,14 @@
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 import logging
 
+from celery import group
+
 from src.core.permissions import Permission
 from src.exceptions.exception import (
     PermissionDeniedHTTPException,
     ObjectNotFoundException,
     OrderNotFoundException,
-    ErrorUpdatingBalancesHTTPException,
     InvalidStatusHTTPException,
     ProductOutOfStockHTTPException,
     OrderCannotModifiedHTTPException,
@@ -15,12 +17,14 @@ from src.exceptions.exception import (
     CancelledOrderHTTPException,
     DeliveredOrderHTTPException,
     AddressNotFoundException,
+    InsufficientStockException,
+    CheckoutJobNotFoundException,
+    CheckoutQueueUnavailableException,
+    ProductSoldOutException,
+    ProductSoldOutHTTPException,
 )
-from src.repositories.utils import (
-    generate_order_number,
-    check_product_availability_and_calculate_simple,
-    get_update_stock_for_cart_query,
-)
+from src.init import checkout_jobs, stock_gate
+from src.repositories.utils import generate_order_number
 from src.schemas.order_items import OrderItemsAdd
 from src.schemas.orders import (
     OrdersAddRequest,
@@ -30,13 +34,15 @@ from src.schemas.orders import (
     OrdersPatch,
     OrdersPut,
 )
-from src.schemas.products import ProductUpdate
 from src.services.addresses import AddressService
 from src.services.auth import AuthService
 from src.services.base import BaseService
 from src.services.carts import CartService
-from src.services.products import ProductService
-from src.tasks.tasks import send_order_status_notification_task
+from src.services.inventory import InventoryService
+from src.tasks.tasks import (
+    send_order_status_notification_task,
+    checkout_order_task,
+)
 
 
 class OrderService(BaseService):
@@ -58,75 +64,134 @@ class OrderService(BaseService):
 
     async def add_order(self, user_id: int, address_id: int, data: OrdersAddRequest):
         cart = await CartService(self.db).get_cart_user_with_check(user_id)
-        # 1. Проверка наличия товаров
-        query = check_product_availability_and_calculate_simple(user_id)
-        result = await self.db.session.execute(query)
-        summary = result.first()
-
-        if not summary or summary.total_items == 0:
-            raise CartEmptyHTTPException
-
-        # 2. Проверка адреса
+        # 1. Проверка адреса
         address = await AddressService(self.db).get_address_with_check(address_id)
         if cart.user_id != address.user_id:
             raise AddressNotFoundException
-        # 3. Получить товары корзины
-        cart_items = await self.db.cart_items.get_filtered(cart_id=cart.id)
 
-        # 3.1. Двойная проверка наличия перед обновлением
-        for item in cart_items:
-            product = await ProductService(self.db).get_product_with_check(
-                item.product_id
+        # 2. Товары корзины одним запросом
+        cart_products = await self.db.products.get_cart_products(cart.id)
+        if not cart_products:
+            raise CartEmptyHTTPException
+        quantities = defaultdict(int)
+        for product in cart_products:
+            quantities[product.id] += product.quantity
+
+        # 3. Шлюз распродаж: распроданное отсекаем до блокировок в Postgres
+        try:
+            gated = await stock_gate.acquire(quantities)
+        except ProductSoldOutException as e:
+            raise ProductSoldOutHTTPException(e.product_id)
+        try:
+            order = await self._place_order(
+                user_id, address_id, data, cart.id, cart_products, quantities
             )
-            if product.stock_quantity < item.quantity:
-                await self.db.rollback()
-                raise ProductOutOfStockHTTPException(product.name)
+        except BaseException:
+            if gated:
+                await stock_gate.release(quantities)
+            raise
+        return order
+
+    async def _place_order(
+        self,
+        user_id: int,
+        address_id: int,
+        data: OrdersAddRequest,
+        cart_id: int,
+        cart_products: list,
+        quantities: dict[int, int],
+    ):
+        # 4. Списать остатки атомарно, с блокировкой в порядке id
+        try:
+            await InventoryService(self.db).reserve(quantities, cart_id)
+        except InsufficientStockException as e:
+            await self.db.rollback()
+            raise ProductOutOfStockHTTPException(e.product)
 
-        # 4. Создать заказ
-        order_number = generate_order_number(user_id)
+        # 5. Создать заказ; позиции и сумма - из того же снимка корзины,
+        # по которому списаны остатки
+        total_amount = sum(
+            product.price * product.quantity for product in cart_products
+        )
+        order_number = generate_order_number(await self.db.orders.next_order_number())
         order_data = OrdersAdd(
             **data.model_dump(),
             user_id=user_id,
             address_id=address_id,
             order_number=order_number,
-            total_amount=summary.total_amount,
+            total_amount=total_amount,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
         )
         order = await self.db.orders.add(order_data)
 
-        # 5. Создать order_items
-        for item in cart_items:
-            product = await ProductService(self.db).get_product_with_check(
-                item.product_id
-            )
-            order_item = OrderItemsAdd(
-                order_id=order.id,
-                product_id=product.id,
-                quantity=item.quantity,
-                final_price=product.price,
-            )
-            await self.db.order_items.add(order_item)
-
-        # 6. Обновить остатки с блокировкой
-        update_stmt = get_update_stock_for_cart_query(user_id)
-        result = await self.db.session.execute(update_stmt)
-        updated = len(result.all())
-
-        if updated != summary.available_items:
-            await self.db.rollback()
-            raise ErrorUpdatingBalancesHTTPException
+        # 6. Создать order_items из корзины
+        await self.db.order_items.add_bulk(
+            [
+                OrderItemsAdd(
+                    order_id=order.id,
+                    product_id=product.id,
+                    quantity=product.quantity,
+                    final_price=product.price,
+                )
+                for product in cart_products
+            ]
+        )
 
-        # 7. Очистить корзину
-        await self.db.cart_items.delete(cart_id=cart.id)
+        # 7. Очистить корзину: только оформленные позиции, добавленное
+        # параллельно остается в корзине
+        await self.db.cart_items.delete_by_ids(
+            [product.cart_item_id for product in cart_products]
+        )
 
         await self.db.commit()
         return order
 
+    async def enqueue_order(
+        self, user_id: int, address_id: int, data: OrdersAddRequest
+    ) -> str:
+        """Быстрые проверки и постановка оформления заказа в очередь Celery.
+
+        Тяжелая часть (блокировки остатков, запись заказа) выполняется
+        воркером, поэтому число одновременных оформлений ограничено числом
+        воркеров, а не пулом соединений API.
+        """
+        cart = await CartService(self.db).get_cart_user_with_check(user_id)
+        address = await AddressService(self.db).get_address_with_check(address_id)
+        if cart.user_id != address.user_id:
+            raise AddressNotFoundException
+        if not await self.db.cart_items.has_items(cart.id):
+            raise CartEmptyHTTPException
+
+        job_id = await checkout_jobs.create(user_id)
+        try:
+            checkout_order_task.delay(job_id, user_id, address_id, data.model_dump())
+        except Exception as e:
+            # Иначе задача навсегда осталась бы в статусе queued
+            logging.error(f"Не удалось поставить оформление заказа в очередь: {e}")
+            await checkout_jobs.update(
+                job_id,
+                status="failed",
+                status_code=503,
+                detail=CheckoutQueueUnavailableException.detail,
+            )
+            raise CheckoutQueueUnavailableException from e
+        return job_id
+
+    async def get_checkout_job(self, job_id: str, user_id: int) -> dict:
+        job = await checkout_jobs.get(job_id)
+        # Чужие задачи не показываем, как и несуществующие
+        if job is None or job.get("user_id") != user_id:
+            raise CheckoutJobNotFoundException
+        return job
+
     async def change_order_status(
         self, order_id: int, status_data: OrderStatusUpdateRequest, user_id: int
     ):
-        order = await self.get_order_with_check(order_id)
+        # Статус проверяется и меняется под блокировкой строки: отмена по
+        # таймауту (cancel_stale_pending) не вклинится между проверкой и
+        # записью, и остатки не вернутся дважды
+        order = await self.lock_order_with_check(order_id)
         if order.user_id != user_id:
             permissions = await AuthService(self.db).get_user_permissions(user_id)
             if Permission.VIEW_USERS.value not in permissions:
@@ -155,10 +220,16 @@ class OrderService(BaseService):
         )
         await self.db.orders.exit(update_data, id=order_id, exclude_unset=True)
 
+        # Отмена возвращает товары на склад
+        if status_data.status == "cancelled" and old_status == "pending":
+            await InventoryService(self.db).restock_orders([order_id])
+
         # Отправляем уведомление с НОВЫМ статусом
         updated_order = await self.get_order_with_check(order_id)
         if status_data.status in ["shipped", "delivered", "paid"]:
-            await self.send_status_notification(updated_order, status_data.status)
+            await self.send_status_notification(
+                updated_order, status_data.status, old_status
+            )
         await self.db.commit()
         return {
             "order_id": order_id,
@@ -168,7 +239,7 @@ class OrderService(BaseService):
         }
 
     async def exit_order(self, order_id: int, user_id: int, data: OrdersPut):
-        order = await self.get_order_with_check(order_id)
+        order = await self.lock_order_with_check(order_id)
         if order.user_id != user_id:
             permissions = await AuthService(self.db).get_user_permissions(user_id)
             if Permission.VIEW_USERS.value not in permissions:
@@ -184,7 +255,7 @@ class OrderService(BaseService):
     async def partial_change_order(
         self, order_id: int, user_id: int, data: OrdersPatch
     ):
-        order = await self.get_order_with_check(order_id)
+        order = await self.lock_order_with_check(order_id)
         if order.user_id != user_id:
             permissions = await AuthService(self.db).get_user_permissions(user_id)
             if Permission.VIEW_USERS.value not in permissions:
@@ -198,7 +269,7 @@ class OrderService(BaseService):
         return order
 
     async def delete_order(self, order_id: int, user_id: int):
-        order = await self.get_order_with_check(order_id)
+        order = await self.lock_order_with_check(order_id)
         if order.user_id != user_id:
             permissions = await AuthService(self.db).get_user_permissions(user_id)
             if Permission.VIEW_USERS.value not in permissions:
@@ -207,46 +278,106 @@ class OrderService(BaseService):
         if order.status not in ["pending", "cancelled"]:
             raise OrderCannotDeletedHTTPException(order.status)
 
-        order_items = await self.db.order_items.get_filtered(order_id=order_id)
-        for item in order_items:
-            product = await ProductService(self.db).get_product_with_check(
-                item.product_id
-            )
-            update_data = ProductUpdate(
-                stock_quantity=product.stock_quantity + item.quantity,
-                updated_at=datetime.utcnow(),
-            )
-            await self.db.products.edit(update_data, id=product.id, exclude_unset=True)
-
-        # Удалить связанные order_items
-        await self.db.order_items.delete(order_id=order_id)
-
-        await self.db.orders.delete(id=order_id)
+        await self.remove_orders([order_id])
         await self.db.commit()
         return {"message": "Заказ удален", "order_id": order_id}
 
-    async def send_status_notification(self, order, new_status: str):
+    async def remove_orders(self, order_ids: list[int]) -> None:
+        """Вернуть остатки и удалить заказы вместе с позициями.
+
+        Строки заказов вызывающий блокирует заранее (lock_order_with_check),
+        иначе отмена по таймауту может вернуть остатки между проверкой
+        статуса и удалением.
+
+        Число запросов не зависит от размера и количества заказов, поэтому
+        подходит и для массовой отмены. Остатки возвращаются только по
+        pending-заказам: отмененные вернули их при отмене. Коммит - на
+        стороне вызывающего.
+        """
+        await InventoryService(self.db).restock_orders(order_ids, status="pending")
+        await self.db.order_items.delete_by_order_ids(order_ids)
+        await self.db.orders.delete_by_ids(order_ids)
+
+    async def expire_pending_orders(
+        self, older_than: timedelta, batch_size: int
+    ) -> int:
+        """Отменить неоплаченные заказы старше older_than и вернуть их остатки.
+
+        Каждая пачка - отдельная транзакция: блокировки держатся недолго,
+        а уже обработанное не откатывается при сбое следующей пачки.
+        """
+        created_before = datetime.utcnow() - older_than
+        expired = 0
+        while True:
+            orders = await self.db.orders.cancel_stale_pending(
+                created_before, batch_size
+            )
+            if not orders:
+                break
+            await InventoryService(self.db).restock_orders(
+                [order.id for order in orders]
+            )
+            users = await self.db.users.get_by_ids(
+                list({order.user_id for order in orders})
+            )
+            await self.db.commit()
+
+            users_by_id = {user.id: user for user in users}
+            notifications = [
+                self._notification_data(
+                    order, users_by_id[order.user_id], "pending", "cancelled"
+                )
+                for order in orders
+                if order.user_id in users_by_id
+            ]
+            try:
+                group(
+                    send_order_status_notification_task.s(data)
+                    for data in notifications
+                ).apply_async()
+            except Exception as e:
+                logging.error(f"Не удалось отправить уведомления об отмене: {e}")
+            expired += len(orders)
+            if len(orders) < batch_size:
+                break
+        return expired
+
+    async def send_status_notification(
+        self, order, new_status: str, old_status: str | None = None
+    ):
         # 1. Получить данные пользователя
         user = await AuthService(self.db).get_user_with_check(order.user_id)
 
         # 2. Подготовить данные
-        notification_data = {
+        notification_data = self._notification_data(
+            order, user, old_status or order.status, new_status
+        )
+        try:
+            send_order_status_notification_task.delay(notification_data)
+        except Exception as e:
+            logging.error(f"Не удалось отправить уведомление: {e}")
+
+    @staticmethod
+    def _notification_data(order, user, old_status: str, new_status: str) -> dict:
+        return {
             "order_id": order.id,
             "order_number": order.order_number,
             "user_id": user.id,
             "user_email": user.email,
-            "old_status": order.status,
+            "old_status": old_status,
             "new_status": new_status,
             "total_amount": order.total_amount,
             "created_at": order.created_at.isoformat() if order.created_at else None,
         }
-        try:
-            send_order_status_notification_task.delay(notification_data)
-        except Exception as e:
-            logging.error(f"Не удалось отправить уведомление: {e}")
 
     async def get_order_with_check(self, order_id: int):
         try:
             return await self.db.orders.get_one(id=order_id)
         except ObjectNotFoundException:
             raise OrderNotFoundException
+
+    async def lock_order_with_check(self, order_id: int):
+        try:
+            return await self.db.orders.get_one_for_update(id=order_id)
+        except ObjectNotFoundException:
+            raise OrderNotFoundException
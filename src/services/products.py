@@ -1,16 +1,30 @@
 from fastapi import UploadFile
 from datetime import datetime
 
-from src.exceptions.exception import ObjectNotFoundException, ProductNotFoundException
+from src.exceptions.exception import (
+    ObjectNotFoundException,
+    ProductNotFoundException,
+    InvalidCursorException,
+)
 from src.schemas.products import (
     ProductsAddRequest,
     ProductsAdd,
     ProductImagesUpdate,
     ProductsPatch,
+    Product,
+    ProductSortField,
+    ProductsPage,
 )
+from src.init import product_cache, stampede_cache, stock_gate
 from src.services.base import BaseService
+from src.utils.http_cache import invalidate_cache_tags
 from src.api.dependencies import PaginationDep
-from src.repositories.utils import generate_sku, save_uploaded_files
+from src.repositories.utils import (
+    generate_sku,
+    save_uploaded_files,
+    encode_cursor,
+    decode_cursor,
+)
 from src.services.brands import BrandService
 from src.services.categories import CategoryService
 
@@ -22,17 +36,96 @@ class ProductService(BaseService):
         name: str | None = None,
         description: str | None = None,
         product_type: str | None = None,
+        sort_by: ProductSortField | None = None,
+        descending: bool = False,
+        cursor: str | None = None,
     ):
         per_page = pagination.per_page or 5
+        if cursor is not None:
+            return await self.get_products_page(
+                per_page, name, description, product_type, sort_by, descending, cursor
+            )
         return await self.db.products.get_search_by_name(
             name=name,
             description=description,
             product_type=product_type,
             limit=per_page,
             offset=per_page * (pagination.page - 1),
+            sort_by=sort_by.value if sort_by else None,
+            descending=descending,
+        )
+
+    async def get_products_page(
+        self,
+        per_page: int,
+        name: str | None,
+        description: str | None,
+        product_type: str | None,
+        sort_by: ProductSortField | None,
+        descending: bool,
+        cursor: str,
+    ) -> ProductsPage:
+        """Страница по курсору; пустой курсор - первая страница"""
+        sort_by = sort_by or ProductSortField.ID
+        after = self._decode_cursor(cursor, sort_by, descending) if cursor else None
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        products = await self.db.products.get_page_after(
+            name=name,
+            description=description,
+            product_type=product_type,
+            limit=per_page + 1,
+            sort_by=sort_by.value,
+            descending=descending,
+            after=after,
         )
+        next_cursor = None
+        if len(products) > per_page:
+            products = products[:per_page]
+            next_cursor = self._encode_cursor(products[-1], sort_by, descending)
+        return ProductsPage(items=products, next_cursor=next_cursor)
 
+    @staticmethod
+    def _encode_cursor(
+        product: Product, sort_by: ProductSortField, descending: bool
+    ) -> str:
+        sort_key = getattr(product, sort_by.value)
+        if isinstance(sort_key, datetime):
+            sort_key = sort_key.isoformat()
+        return encode_cursor(
+            {"s": sort_by.value, "d": descending, "k": sort_key, "id": product.id}
+        )
+
+    @staticmethod
+    def _decode_cursor(
+        cursor: str, sort_by: ProductSortField, descending: bool
+    ) -> tuple:
+        payload = decode_cursor(cursor)
+        # Курсор действителен только для той же сортировки, в которой выдан
+        if payload.get("s") != sort_by.value or payload.get("d") != descending:
+            raise InvalidCursorException
+        last_id = payload.get("id")
+        sort_key = payload.get("k")
+        if not isinstance(last_id, int):
+            raise InvalidCursorException
+        if sort_by == ProductSortField.CREATED_AT:
+            try:
+                sort_key = datetime.fromisoformat(sort_key)
+            except (TypeError, ValueError):
+                raise InvalidCursorException
+        elif not isinstance(sort_key, (int, float)):
+            raise InvalidCursorException
+        return sort_key, last_id
+
+    @stampede_cache.cached(
+        product_cache.KEY,
+        schema=Product,
+        ttl=product_cache.ttl,
+        local=product_cache.local,
+    )
     async def get_product(self, product_id: int):
+        # Кеш наполняется только из основной БД: отстающая реплика вернула
+        # бы карточку до изменения, которое этот ключ только что сбросило
+        await self.db.use_primary()
         return await self.get_product_with_check(product_id)
 
     async def add_product(
@@ -54,6 +147,7 @@ class ProductService(BaseService):
         )
         product = await self.db.products.add(product_data)
         await self.db.commit()
+        await invalidate_cache_tags("products")
         return product
 
     async def add_product_images(self, product_id: int, images: list[UploadFile]):
@@ -67,6 +161,8 @@ class ProductService(BaseService):
         update_data = ProductImagesUpdate(images=saved_paths)
         # Обновляем БД
         await self.db.products.exit(update_data, exclude_unset=True, id=product_id)
+        self.db.after_commit(lambda: product_cache.invalidate(product_id))
+        self.db.after_commit(lambda: invalidate_cache_tags("products"))
         await self.db.commit()
         return {"saved_paths": saved_paths, "product_id": product_id}
 
@@ -82,6 +178,8 @@ class ProductService(BaseService):
         await CategoryService(self.db).get_category_with_check(category_id)
         await BrandService(self.db).get_brand_with_check(brand_id)
         await self.db.products.exit(data, id=product_id, exclude_unset=exclude_unset)
+        self.db.after_commit(lambda: product_cache.invalidate(product_id))
+        self.db.after_commit(lambda: invalidate_cache_tags("products"))
         await self.db.commit()
 
     async def delete_product(self, product_id: int):
@@ -97,8 +195,29 @@ class ProductService(BaseService):
                 if os.path.exists(image_path):
                     os.remove(image_path)
         await self.db.products.delete(id=product_id)
+        self.db.after_commit(lambda: product_cache.invalidate(product_id))
+        self.db.after_commit(lambda: invalidate_cache_tags("products"))
         await self.db.commit()
 
+    async def enable_stock_gate(self, product_id: int) -> None:
+        product = await self.get_product_with_check(product_id)
+        await stock_gate.enable(product.id, product.stock_quantity)
+
+    async def disable_stock_gate(self, product_id: int) -> None:
+        await stock_gate.disable(product_id)
+
+    async def reconcile_stock_gate(self) -> None:
+        """Выровнять счетчики шлюза по остаткам в БД"""
+        product_ids = await stock_gate.gated_products()
+        if not product_ids:
+            return
+        stocks = await self.db.products.get_stock_quantities(product_ids)
+        for product_id in product_ids:
+            if product_id in stocks:
+                await stock_gate.reset(product_id, stocks[product_id])
+            else:
+                await stock_gate.disable(product_id)
+
     async def get_product_with_check(self, product_id: int):
         try:
             return await self.db.products.get_one(id=product_id)
@@ -1,6 +1,8 @@
 from src.core.permissions import ROLE_PERMISSIONS
 from src.exceptions.exception import RoleNotExistsException, ObjectNotFoundException
+from src.init import permission_cache, reference_cache
 from src.services.base import BaseService
+from src.utils.http_cache import invalidate_cache_tags
 from src.schemas.roles import RoleAdd, RoleUpdate, RolePatch
 
 
@@ -24,17 +26,24 @@ class RoleService(BaseService):
         )
         role = await self.db.roles.add(role_data)
         await self.db.commit()
+        await reference_cache.invalidate("roles")
+        await invalidate_cache_tags("roles")
         return role
 
     async def exit_role(self, role_name: str, data: RoleUpdate):
-        await self.get_role_with_check(role_name)
+        role = await self.lock_role_with_check(role_name)
         await self.db.roles.exit(data, exclude_unset=True, name=role_name)
         await self.db.commit()
+        await permission_cache.invalidate_role(role.id)
+        await reference_cache.invalidate("roles")
+        await invalidate_cache_tags("roles", f"role:{role_name}")
 
     async def partial_change_role(
         self, role_name: str, data: RolePatch, exclude_unset: bool = False
     ):
-        role = await self.get_role_with_check(role_name)
+        # Права сливаются с текущими: читаем их из БД под блокировкой, а не
+        # из снимка воркера, иначе затрем параллельное изменение
+        role = await self.lock_role_with_check(role_name)
         update_dict = {}
         if data.description is not None:
             update_dict["description"] = data.description
@@ -52,15 +61,32 @@ class RoleService(BaseService):
             update_data, exclude_unset=exclude_unset, name=role_name
         )
         await self.db.commit()
+        await permission_cache.invalidate_role(role.id)
+        await reference_cache.invalidate("roles")
+        await invalidate_cache_tags("roles", f"role:{role_name}")
 
     async def delete_role(self, role_name: str):
+        role = await self.lock_role_with_check(role_name)
         try:
             await self.db.roles.delete_role_with_current_name(role_name)
         except ObjectNotFoundException:
             raise RoleNotExistsException
+        await permission_cache.invalidate_role(role.id)
+        await reference_cache.invalidate("roles")
+        await invalidate_cache_tags("roles", f"role:{role_name}")
 
     async def get_role_with_check(self, role_name: str):
+        """Проверка существования по снимку воркера - только для чтения"""
+        role = reference_cache.get_role(role_name)
+        if role is not None:
+            return role
         try:
             return await self.db.roles.get_one(name=role_name)
         except ObjectNotFoundException:
             raise RoleNotExistsException
+
+    async def lock_role_with_check(self, role_name: str):
+        try:
+            return await self.db.roles.get_one_for_update(name=role_name)
+        except ObjectNotFoundException:
+            raise RoleNotExistsException
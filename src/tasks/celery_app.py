@@ -8,3 +8,18 @@ celery_instance = Celery(
         "src.tasks.tasks",
     ],
 )
+
+celery_instance.conf.beat_schedule = {
+    "reconcile-stock-gate": {
+        "task": "src.tasks.tasks.reconcile_stock_gate_task",
+        "schedule": settings.STOCK_GATE_RECONCILE_SECONDS,
+    },
+    "release-expired-cart-reservations": {
+        "task": "src.tasks.tasks.release_expired_reservations_task",
+        "schedule": settings.CART_RESERVATION_PURGE_SECONDS,
+    },
+    "expire-pending-orders": {
+        "task": "src.tasks.tasks.expire_pending_orders_task",
+        "schedule": settings.ORDER_EXPIRY_INTERVAL_SECONDS,
+    },
+}
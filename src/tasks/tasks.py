@@ -1,4 +1,9 @@
+import asyncio
 import logging
+
+from fastapi import HTTPException
+
+from src.exceptions.exception import FashionStoreException
 from src.tasks.celery_app import celery_instance
 
 
@@ -24,3 +29,113 @@ def send_order_status_notification_task(data: dict):
         file.write(content)
 
     logging.info(f"Уведомление для заказа #{data['order_number']} отправлено")
+
+
+@celery_instance.task()
+def checkout_order_task(job_id: str, user_id: int, address_id: int, order_data: dict):
+    asyncio.run(checkout_order(job_id, user_id, address_id, order_data))
+
+
+async def checkout_order(job_id: str, user_id: int, address_id: int, order_data: dict):
+    # Импорт внутри: сервис заказов сам импортирует этот модуль ради задач
+    from src.database import async_session_maker_null_pool
+    from src.init import redis_connector, checkout_jobs
+    from src.schemas.orders import OrdersAddRequest
+    from src.services.orders import OrderService
+    from src.utils.db_manager import DBManager
+
+    await redis_connector.connect()
+    try:
+        await checkout_jobs.update(job_id, status="processing")
+        try:
+            async with DBManager(session_factory=async_session_maker_null_pool) as db:
+                order = await OrderService(db).add_order(
+                    user_id, address_id, OrdersAddRequest(**order_data)
+                )
+        except HTTPException as e:
+            await checkout_jobs.update(
+                job_id, status="failed", status_code=e.status_code, detail=e.detail
+            )
+            return
+        except FashionStoreException as e:
+            await checkout_jobs.update(
+                job_id, status="failed", status_code=400, detail=e.detail
+            )
+            return
+        except Exception:
+            logging.exception(f"Ошибка фонового оформления заказа, задача {job_id}")
+            await checkout_jobs.update(
+                job_id, status="failed", status_code=500, detail="Внутренняя ошибка"
+            )
+            return
+        await checkout_jobs.update(
+            job_id,
+            status="completed",
+            order_id=order.id,
+            order_number=order.order_number,
+        )
+    finally:
+        await redis_connector.close()
+
+
+@celery_instance.task()
+def reconcile_stock_gate_task():
+    asyncio.run(reconcile_stock_gate())
+
+
+async def reconcile_stock_gate():
+    from src.database import async_session_maker_null_pool
+    from src.init import redis_connector
+    from src.services.products import ProductService
+    from src.utils.db_manager import DBManager
+
+    await redis_connector.connect()
+    try:
+        async with DBManager(session_factory=async_session_maker_null_pool) as db:
+            await ProductService(db).reconcile_stock_gate()
+    finally:
+        await redis_connector.close()
+
+
+@celery_instance.task()
+def release_expired_reservations_task():
+    asyncio.run(release_expired_reservations())
+
+
+async def release_expired_reservations():
+    from src.database import async_session_maker_null_pool
+    from src.services.cart_items import CartItemService
+    from src.utils.db_manager import DBManager
+
+    async with DBManager(session_factory=async_session_maker_null_pool) as db:
+        released = await CartItemService(db).release_expired_reservations()
+    if released:
+        logging.info(f"Снято истекших резервов корзин: {released}")
+
+
+@celery_instance.task()
+def expire_pending_orders_task():
+    asyncio.run(expire_pending_orders())
+
+
+async def expire_pending_orders():
+    from datetime import timedelta
+
+    from src.config import settings
+    from src.database import async_session_maker_null_pool
+    from src.init import redis_connector
+    from src.services.orders import OrderService
+    from src.utils.db_manager import DBManager
+
+    # Redis нужен для сброса кеша карточек товаров с вернувшимися остатками
+    await redis_connector.connect()
+    try:
+        async with DBManager(session_factory=async_session_maker_null_pool) as db:
+            expired = await OrderService(db).expire_pending_orders(
+                older_than=timedelta(minutes=settings.ORDER_PAYMENT_TIMEOUT_MINUTES),
+                batch_size=settings.ORDER_EXPIRY_BATCH_SIZE,
+            )
+    finally:
+        await redis_connector.close()
+    if expired:
+        logging.info(f"Отменено неоплаченных заказов: {expired}")
@@ -0,0 +1,34 @@
+import json
+import uuid
+
+from src.connectors.redis_connector import RedisConnector
+
+
+class CheckoutJobStore:
+    """Статусы фоновых оформлений заказа в Redis (общие для API и воркеров)"""
+
+    KEY = "checkout:job:{job_id}"
+
+    def __init__(self, redis_connector: RedisConnector, ttl: int):
+        self.redis_connector = redis_connector
+        self.ttl = ttl
+
+    async def create(self, user_id: int) -> str:
+        job_id = uuid.uuid4().hex
+        job = {"job_id": job_id, "user_id": user_id, "status": "queued"}
+        await self._save(job_id, job)
+        return job_id
+
+    async def update(self, job_id: str, **fields) -> None:
+        job = await self.get(job_id) or {"job_id": job_id}
+        job.update(fields)
+        await self._save(job_id, job)
+
+    async def get(self, job_id: str) -> dict | None:
+        cached = await self.redis_connector.get(self.KEY.format(job_id=job_id))
+        return json.loads(cached) if cached else None
+
+    async def _save(self, job_id: str, job: dict) -> None:
+        await self.redis_connector.set(
+            self.KEY.format(job_id=job_id), json.dumps(job), expire=self.ttl
+        )
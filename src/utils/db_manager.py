@@ -1,6 +1,13 @@
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.repositories.addresses import AddressesRepository
+from src.repositories.base import BaseRepository
 from src.repositories.brands import BrandsRepository
 from src.repositories.cart_items import CartItemsRepository
+from src.repositories.cart_reservations import CartReservationsRepository
 from src.repositories.carts import CartsRepository
 from src.repositories.categories import CategoriesRepository
 from src.repositories.order_items import OrderItemsRepository
@@ -12,37 +19,133 @@ from src.repositories.users import UsersRepository
 
 
 class DBManager:
-    def __init__(self, session_factory):
+    """Сессия и репозитории создаются лениво - при первом обращении.
+
+    Запросы, которые не дошли до БД (кеш, отказ в доступе), не создают
+    сессию и не берут соединение из пула. При read_only=True сессия
+    открывается через read_session_factory (реплика), если она задана.
+    """
+
+    def __init__(self, session_factory, read_session_factory=None, read_only=False):
         self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+        self.read_only = read_only
+        self._session: AsyncSession | None = None
+        self._repositories: dict[type[BaseRepository], BaseRepository] = {}
+        self._after_commit: list[Callable[[], Awaitable[None]]] = []
 
     async def __aenter__(self):
-        self.session = self.session_factory()
-
-        self.addresses = AddressesRepository(self.session)
-        self.brands = BrandsRepository(self.session)
-        self.categories = CategoriesRepository(self.session)
-        self.cart_items = CartItemsRepository(self.session)
-        self.carts = CartsRepository(self.session)
-        self.order_items = OrderItemsRepository(self.session)
-        self.orders = OrdersRepository(self.session)
-        self.products = ProductsRepository(self.session)
-        self.reviews = ReviewsRepository(self.session)
-        self.roles = RolesRepository(self.session)
-        self.users = UsersRepository(self.session)
-
         return self
 
     async def __aexit__(self, *args):
-        await self.session.rollback()
-        await self.session.close()
+        if self._session is None:
+            return
+        if self._session.in_transaction():
+            await self._session.rollback()
+        await self._session.close()
+        self._session = None
+        self._repositories.clear()
+        self._after_commit.clear()
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            if self.read_only and self.read_session_factory is not None:
+                self._session = self.read_session_factory()
+            else:
+                self._session = self.session_factory()
+        return self._session
+
+    async def use_primary(self) -> None:
+        """Переключить читающий запрос на основную БД.
+
+        Сессия реплики, если уже открыта, только читала - ее можно закрыть.
+        """
+        if not self.read_only:
+            return
+        self.read_only = False
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._repositories.clear()
+
+    def _repository(self, repository_class: type[BaseRepository]):
+        repository = self._repositories.get(repository_class)
+        if repository is None:
+            repository = repository_class(self.session)
+            self._repositories[repository_class] = repository
+        return repository
+
+    @property
+    def addresses(self) -> AddressesRepository:
+        return self._repository(AddressesRepository)
+
+    @property
+    def brands(self) -> BrandsRepository:
+        return self._repository(BrandsRepository)
+
+    @property
+    def categories(self) -> CategoriesRepository:
+        return self._repository(CategoriesRepository)
+
+    @property
+    def cart_items(self) -> CartItemsRepository:
+        return self._repository(CartItemsRepository)
+
+    @property
+    def cart_reservations(self) -> CartReservationsRepository:
+        return self._repository(CartReservationsRepository)
+
+    @property
+    def carts(self) -> CartsRepository:
+        return self._repository(CartsRepository)
+
+    @property
+    def order_items(self) -> OrderItemsRepository:
+        return self._repository(OrderItemsRepository)
+
+    @property
+    def orders(self) -> OrdersRepository:
+        return self._repository(OrdersRepository)
+
+    @property
+    def products(self) -> ProductsRepository:
+        return self._repository(ProductsRepository)
+
+    @property
+    def reviews(self) -> ReviewsRepository:
+        return self._repository(ReviewsRepository)
+
+    @property
+    def roles(self) -> RolesRepository:
+        return self._repository(RolesRepository)
+
+    @property
+    def users(self) -> UsersRepository:
+        return self._repository(UsersRepository)
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Выполнить callback после успешного коммита (сброс кешей и т.п.).
+
+        До коммита сбрасывать кеш рано: параллельный запрос успеет
+        закешировать старые данные. При откате callback отменяется.
+        """
+        self._after_commit.append(callback)
 
     async def commit(self):
-        await self.session.commit()
+        if self._session:
+            await self._session.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logging.error(f"Ошибка обработчика после коммита: {e}")
 
     async def rollback(self):
-        if self.session:
-            await self.session.rollback()
+        if self._session:
+            await self._session.rollback()
+        self._after_commit.clear()
 
     async def begin(self):
-        if self.session:
-            await self.session.begin()
+        await self.session.begin()
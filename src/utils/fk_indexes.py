@@ -0,0 +1,40 @@
+import sys
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, UniqueConstraint
+
+
+def find_unindexed_foreign_keys(metadata: MetaData) -> list[str]:
+    """Колонки внешних ключей, которые не стоят первыми ни в одном индексе.
+
+    Без такого индекса выборки по FK и удаление родительских строк
+    делают последовательное сканирование дочерней таблицы.
+    """
+    unindexed = []
+    for table in metadata.sorted_tables:
+        leading_columns = {
+            next(iter(index.columns)).name for index in table.indexes if index.columns
+        }
+        for constraint in table.constraints:
+            if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint)):
+                if constraint.columns:
+                    leading_columns.add(next(iter(constraint.columns)).name)
+        leading_columns.update(
+            column.name for column in table.columns if column.index or column.unique
+        )
+
+        for foreign_key in table.foreign_keys:
+            column = foreign_key.parent
+            if column.name not in leading_columns:
+                unindexed.append(f"{table.name}.{column.name}")
+    return sorted(unindexed)
+
+
+if __name__ == "__main__":
+    # python -m src.utils.fk_indexes
+    from src.database import Base
+    from src.models import *  # noqa
+
+    columns = find_unindexed_foreign_keys(Base.metadata)
+    for column in columns:
+        print(f"Внешний ключ без индекса: {column}")
+    sys.exit(1 if columns else 0)
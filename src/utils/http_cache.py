@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from uuid import uuid4
+
+from starlette.requests import Request
+
+from src.init import redis_connector
+
+TAG_VERSION_KEY = "cache:version:{tag}"
+
+
+def cache_key_builder(*tags: str) -> Callable[..., str]:
+    """key_builder для fastapi-cache: ключ из пути, query-параметров и версий тегов.
+
+    Стандартный билдер хеширует все kwargs эндпоинта, включая DBManager и
+    user_id, поэтому запись никогда не переиспользуется. Шаблоны тегов
+    подставляют path-параметры, например "category:{category_id}". Сброс
+    тега меняет его версию, а с ней и ключ: старые записи больше не читаются
+    и истекают по своему TTL, множества ключей по тегам не нужны.
+    """
+
+    async def key_builder(
+        func,
+        namespace: str = "",
+        *,
+        request: Request | None = None,
+        response=None,
+        args=(),
+        kwargs=None,
+    ) -> str:
+        query = sorted(request.query_params.multi_items()) if request else []
+        path = request.url.path if request else ""
+        path_params = request.path_params if request else {}
+        tag_names = [tag.format(**path_params) for tag in tags]
+        if request is not None:
+            versions = await get_request_tag_versions(request, *tag_names)
+        else:
+            versions = await get_tag_versions(*tag_names)
+        raw = f"{func.__module__}:{func.__name__}:{path}:{query}:{versions}"
+        return f"{namespace}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+    return key_builder
+
+
+async def invalidate_cache_tags(*tags: str) -> None:
+    """Сменить версии тегов: закешированные с ними ответы перестают читаться"""
+    if not redis_connector.is_connected or not tags:
+        return
+    try:
+        await redis_connector.mset(
+            {TAG_VERSION_KEY.format(tag=tag): _new_version() for tag in tags}
+        )
+    except Exception as e:
+        logging.error(f"Не удалось сбросить кеш по тегам {tags}: {e}")
+
+
+async def get_tag_versions(*tags: str) -> list[str] | None:
+    """Текущие версии тегов; None, если Redis недоступен.
+
+    Версия - время изменения в наносекундах со случайным суффиксом: значение
+    уникально даже при одновременных изменениях с разных воркеров.
+    """
+    if not redis_connector.is_connected:
+        return None
+    try:
+        keys = [TAG_VERSION_KEY.format(tag=tag) for tag in tags]
+        versions = await redis_connector.mget(*keys)
+        missing = [key for key, version in zip(keys, versions) if version is None]
+        if missing:
+            # Первая версия: при гонке побеждает один SET NX, перечитываем
+            for key in missing:
+                await redis_connector.set_if_not_exists(key, _new_version())
+            versions = await redis_connector.mget(*keys)
+        return [
+            version.decode() if isinstance(version, bytes) else version
+            for version in versions
+        ]
+    except Exception as e:
+        logging.warning(f"Не удалось прочитать версии тегов кеша: {e}")
+        return None
+
+
+async def get_request_tag_versions(request: Request, *tags: str) -> list[str] | None:
+    """Версии тегов, зафиксированные за запросом при первом чтении.
+
+    ETag (conditional_get) и ключ кеша ответа строятся по одним и тем же
+    значениям: тело, собранное после смены версии, не попадет под старый
+    ETag, а собранное до нее - под новый.
+    """
+    known = getattr(request.state, "tag_versions", None)
+    if known is None:
+        known = {}
+        request.state.tag_versions = known
+    missing = [tag for tag in tags if tag not in known]
+    if missing:
+        versions = await get_tag_versions(*missing)
+        if versions is None:
+            return None
+        known.update(zip(missing, versions))
+    return [known[tag] for tag in tags]
+
+
+def tag_version_time(version: str) -> datetime:
+    return datetime.fromtimestamp(int(version.split("-")[0]) / 1e9, tz=timezone.utc)
+
+
+def _new_version() -> str:
+    return f"{time.time_ns()}-{uuid4().hex[:8]}"
@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from passlib.context import CryptContext
+
+from src.exceptions.exception import PasswordHasherBusyHTTPException
+
+
+class PasswordHasher:
+    """Хеширование паролей bcrypt в отдельном ограниченном пуле потоков.
+
+    bcrypt занимает десятки миллисекунд CPU и не должен блокировать event loop.
+    Если все потоки заняты и очередь заполнена - отказываем сразу (503),
+    а не копим ожидающие запросы.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, max_queue: int):
+        # min/max_rounds равны стоимости: хеши с другой стоимостью
+        # помечаются устаревшими и перехешируются при входе
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._capacity = max_workers + max_queue
+        self._in_flight = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """Проверяет пароль; вторым значением - новый хеш, если стоимость изменилась"""
+        return await self._run(
+            self.pwd_context.verify_and_update, password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func: Callable, *args) -> Any:
+        if self._in_flight >= self._capacity:
+            raise PasswordHasherBusyHTTPException
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
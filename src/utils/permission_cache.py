@@ -0,0 +1,210 @@
+import json
+import logging
+from typing import Awaitable, Callable
+
+from src.connectors.redis_connector import RedisConnector
+from src.core.permissions import permissions_version
+from src.utils.cache import TTLCache
+from src.utils.stampede_cache import WRITE_SCRIPT
+
+
+class PermissionCache:
+    """Кеш прав пользователей: LRU в памяти процесса + общий уровень в Redis.
+
+    Храним отдельно связку пользователь -> роль и роль -> права, чтобы
+    изменение роли сбрасывало одну запись, а не записи всех её пользователей.
+    Сброс увеличивает поколение записи: загрузка, прочитавшая БД до
+    изменения, не запишет старые данные поверх сброса.
+    """
+
+    USER_ROLE_KEY = "permissions:user_role:{user_id}"
+    ROLE_KEY = "permissions:role:{role_id}"
+    USER_ROLE_GENERATION_KEY = "permissions:generation:user_role:{user_id}"
+    ROLE_GENERATION_KEY = "permissions:generation:role:{role_id}"
+
+    def __init__(
+        self,
+        redis_connector: RedisConnector,
+        maxsize: int,
+        ttl: int,
+        redis_ttl: int,
+    ):
+        self.redis_connector = redis_connector
+        self.redis_ttl = redis_ttl
+        self._user_roles = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._roles = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._role_versions = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get_user_permissions(
+        self,
+        user_id: int,
+        load_user_role: Callable[[int], Awaitable[tuple[int, dict]]],
+        load_role: Callable[[int], Awaitable[dict]],
+    ) -> dict:
+        role_id = await self._get_user_role_id(user_id)
+        if role_id is None:
+            generation = await self._generation(self._user_role_generation(user_id))
+            role_id, permissions = await load_user_role(user_id)
+            # Права роли отсюда не кешируем: ее поколение до загрузки было
+            # неизвестно, их закеширует get_role_permissions
+            await self._set_user_role_id(user_id, role_id, generation)
+            return permissions
+        return await self.get_role_permissions(role_id, load_role)
+
+    async def get_user_role_id(
+        self,
+        user_id: int,
+        load_user_role: Callable[[int], Awaitable[tuple[int, dict]]],
+    ) -> int:
+        role_id = await self._get_user_role_id(user_id)
+        if role_id is None:
+            generation = await self._generation(self._user_role_generation(user_id))
+            role_id, _ = await load_user_role(user_id)
+            await self._set_user_role_id(user_id, role_id, generation)
+        return role_id
+
+    async def get_role_permissions(
+        self, role_id: int, load_role: Callable[[int], Awaitable[dict]]
+    ) -> dict:
+        permissions = self._roles.get(role_id)
+        if permissions is not None:
+            return permissions
+
+        cached = await self._redis_get(self.ROLE_KEY.format(role_id=role_id))
+        if cached is not None:
+            permissions = json.loads(cached)
+            self._roles.set(role_id, permissions)
+            return permissions
+
+        generation = await self._generation(self._role_generation(role_id))
+        permissions = await load_role(role_id)
+        await self._set_role_permissions(role_id, permissions, generation)
+        return permissions
+
+    async def get_role_version(
+        self, role_id: int, load_role: Callable[[int], Awaitable[dict]]
+    ) -> str:
+        version = self._role_versions.get(role_id)
+        if version is None:
+            permissions = await self.get_role_permissions(role_id, load_role)
+            version = permissions_version(permissions)
+            self._role_versions.set(role_id, version)
+        return version
+
+    async def invalidate_user(self, user_id: int) -> None:
+        self._user_roles.delete(user_id)
+        await self._redis_delete(
+            self.USER_ROLE_KEY.format(user_id=user_id),
+            self._user_role_generation(user_id),
+        )
+
+    async def invalidate_role(self, role_id: int) -> None:
+        self._roles.delete(role_id)
+        self._role_versions.delete(role_id)
+        await self._redis_delete(
+            self.ROLE_KEY.format(role_id=role_id), self._role_generation(role_id)
+        )
+
+    def clear_local_roles(self) -> None:
+        """Сбросить права ролей в памяти процесса (Redis-уровень не трогаем)"""
+        self._roles.clear()
+        self._role_versions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "user_roles": self._user_roles.stats(),
+            "roles": self._roles.stats(),
+        }
+
+    async def _get_user_role_id(self, user_id: int) -> int | None:
+        role_id = self._user_roles.get(user_id)
+        if role_id is not None:
+            return role_id
+
+        cached = await self._redis_get(self.USER_ROLE_KEY.format(user_id=user_id))
+        if cached is None:
+            return None
+        role_id = int(cached)
+        self._user_roles.set(user_id, role_id)
+        return role_id
+
+    async def _set_user_role_id(
+        self, user_id: int, role_id: int, generation: str | None
+    ) -> None:
+        stored = await self._redis_set(
+            self.USER_ROLE_KEY.format(user_id=user_id),
+            str(role_id),
+            self._user_role_generation(user_id),
+            generation,
+        )
+        if stored:
+            self._user_roles.set(user_id, role_id)
+
+    async def _set_role_permissions(
+        self, role_id: int, permissions: dict, generation: str | None
+    ) -> None:
+        stored = await self._redis_set(
+            self.ROLE_KEY.format(role_id=role_id),
+            json.dumps(permissions),
+            self._role_generation(role_id),
+            generation,
+        )
+        if stored:
+            self._roles.set(role_id, permissions)
+
+    def _user_role_generation(self, user_id: int) -> str:
+        return self.USER_ROLE_GENERATION_KEY.format(user_id=user_id)
+
+    def _role_generation(self, role_id: int) -> str:
+        return self.ROLE_GENERATION_KEY.format(role_id=role_id)
+
+    # Redis - необязательный уровень: при его недоступности работаем через БД
+    async def _redis_get(self, key: str):
+        if not self.redis_connector.is_connected:
+            return None
+        try:
+            return await self.redis_connector.get(key)
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать права из Redis: {e}")
+            return None
+
+    async def _generation(self, generation_key: str) -> str | None:
+        """Поколение записи до загрузки; None - Redis недоступен"""
+        if not self.redis_connector.is_connected:
+            return None
+        try:
+            generation = await self.redis_connector.get(generation_key)
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать поколение прав из Redis: {e}")
+            return None
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return generation or "0"
+
+    async def _redis_set(
+        self, key: str, value: str, generation_key: str, generation: str | None
+    ) -> bool:
+        """Записать, если с начала загрузки не было сброса.
+
+        False - был сброс: загруженное устарело, его не кешируем и в памяти.
+        """
+        if generation is None:
+            return True
+        try:
+            stored = await self.redis_connector.eval(
+                WRITE_SCRIPT, [key, generation_key], [generation, value, self.redis_ttl]
+            )
+        except Exception as e:
+            logging.warning(f"Не удалось сохранить права в Redis: {e}")
+            return True
+        return bool(stored)
+
+    async def _redis_delete(self, key: str, generation_key: str) -> None:
+        if not self.redis_connector.is_connected:
+            return
+        try:
+            # Сначала поколение: загрузки, начатые до сброса, не запишутся
+            await self.redis_connector.incr(generation_key)
+            await self.redis_connector.delete(key)
+        except Exception as e:
+            logging.error(f"Не удалось сбросить права в Redis: {e}")
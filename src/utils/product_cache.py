@@ -0,0 +1,36 @@
+from src.utils.cache import TTLCache
+from src.utils.stampede_cache import StampedeCache
+
+
+class ProductCache:
+    """Кеш карточек товаров: общий уровень в Redis + необязательный L1.
+
+    Чтение идет через StampedeCache (декоратор на ProductService.get_product),
+    здесь - ключ, L1 и сброс. Остаток входит в карточку, поэтому запись
+    сбрасывается после коммита каждого изменения товара, включая списания и
+    возвраты остатков; загрузка, начатая до сброса, запись уже не вернет.
+    L1 живет в памяти процесса и не получает сбросов от других воркеров:
+    его TTL - допустимое отставание карточки (по умолчанию L1 выключен).
+    """
+
+    KEY = "products:detail:{product_id}"
+
+    def __init__(
+        self,
+        stampede_cache: StampedeCache,
+        ttl: int,
+        l1_maxsize: int,
+        l1_ttl: float,
+    ):
+        self.stampede_cache = stampede_cache
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=l1_maxsize, ttl=l1_ttl)
+
+    async def invalidate(self, *product_ids: int) -> None:
+        keys = [self.KEY.format(product_id=product_id) for product_id in product_ids]
+        for key in keys:
+            self.local.delete(key)
+        await self.stampede_cache.invalidate(*keys)
+
+    def stats(self) -> dict:
+        return self.local.stats()
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from pydantic import BaseModel
+
+from src.connectors.redis_connector import RedisConnector
+from src.utils.db_manager import DBManager
+from src.utils.permission_cache import PermissionCache
+
+
+class ReferenceDataCache:
+    """Снимок справочников (бренды, категории, роли) в памяти воркера.
+
+    Загружается при старте приложения; после записи в любой справочник
+    воркер сбрасывает свою копию и публикует имя таблицы в Redis, остальные
+    воркеры перечитывают ее по подписке. Пока снимка таблицы нет (не
+    загружен, перечитывается, потеряна подписка) и при промахе поиск идет в БД.
+    """
+
+    CHANNEL = "reference-data:invalidate"
+    TABLES = ("brands", "categories", "roles")
+
+    def __init__(
+        self, redis_connector: RedisConnector, permission_cache: PermissionCache
+    ):
+        self.redis_connector = redis_connector
+        self.permission_cache = permission_cache
+        self.session_factory = None
+        self._tables: dict[str, dict] = {}
+        self._listener: asyncio.Task | None = None
+
+    async def start(self, session_factory) -> None:
+        self.session_factory = session_factory
+        await self._reload_all()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._tables.clear()
+
+    def get_brand(self, brand_id: int) -> BaseModel | None:
+        return self._get("brands", brand_id)
+
+    def get_category(self, category_id: int) -> BaseModel | None:
+        return self._get("categories", category_id)
+
+    def get_role(self, role_name: str) -> BaseModel | None:
+        return self._get("roles", role_name)
+
+    async def invalidate(self, table: str) -> None:
+        """Вызывать после коммита записи в справочник"""
+        self._tables.pop(table, None)
+        if not self.redis_connector.is_connected:
+            return
+        try:
+            await self.redis_connector.publish(self.CHANNEL, table)
+        except Exception as e:
+            logging.error(f"Не удалось разослать сброс справочника {table}: {e}")
+
+    def _get(self, table: str, key) -> BaseModel | None:
+        item = self._tables.get(table, {}).get(key)
+        # Копия: вызывающий код может менять объект (например, права роли)
+        return item.model_copy(deep=True) if item is not None else None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.redis_connector.pubsub()
+                await pubsub.subscribe(self.CHANNEL)
+                # Пока подписки не было, сбросы могли потеряться
+                await self._reload_all()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self._reload(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Подписка на сброс справочников прервана: {e}")
+                self._tables.clear()
+                await asyncio.sleep(1)
+
+    async def _reload_all(self) -> None:
+        for table in self.TABLES:
+            await self._reload(table)
+
+    async def _reload(self, table: str) -> None:
+        if table not in self.TABLES or self.session_factory is None:
+            return
+        self._tables.pop(table, None)
+        if table == "roles":
+            # Права ролей в кеше прав этого воркера тоже могли устареть
+            self.permission_cache.clear_local_roles()
+        key_attr = "name" if table == "roles" else "id"
+        try:
+            async with DBManager(session_factory=self.session_factory) as db:
+                items = await getattr(db, table).get_all()
+        except Exception as e:
+            logging.error(f"Не удалось загрузить справочник {table}: {e}")
+            return
+        self._tables[table] = {getattr(item, key_attr): item for item in items}
@@ -0,0 +1,286 @@
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from src.connectors.redis_connector import RedisConnector
+from src.utils.cache import TTLCache
+
+# Снять блокировку, только если она все еще наша: по истечении lock_ttl
+# ее мог взять другой воркер
+UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Записать значение, только если ключ не сбрасывали с начала загрузки:
+# запрос, прочитавший данные до изменения, не вернет их в кеш после сброса
+WRITE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class StampedeCache:
+    """Кеш результатов сервисных методов с защитой от лавины промахов.
+
+    Одновременные промахи по одному ключу внутри процесса ждут один и тот
+    же запрос (single-flight), между воркерами - блокировку в Redis.
+    Запись живет ttl + stale_ttl: после ttl она считается устаревшей, ее
+    пересчитывает один запрос, а остальные получают старое значение.
+    Без Redis метод вызывается напрямую, single-flight сохраняется.
+    """
+
+    KEY = "cache:value:{key}"
+    LOCK_KEY = "cache:lock:{key}"
+    GENERATION_KEY = "cache:generation:{key}"
+    POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        redis_connector: RedisConnector,
+        stale_ttl: int,
+        lock_ttl: int,
+        lock_wait: float,
+    ):
+        self.redis_connector = redis_connector
+        self.stale_ttl = stale_ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def cached(
+        self,
+        key: str,
+        schema: Any,
+        ttl: int,
+        stale_ttl: int | None = None,
+        local: TTLCache | None = None,
+    ):
+        """Декоратор метода; key - шаблон из аргументов, например
+        "products:detail:{product_id}". local - необязательный L1 в памяти
+        процесса, его записи сбрасывает владелец кеша.
+        """
+        adapter = TypeAdapter(schema)
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+
+        def decorator(func: Callable[..., Awaitable[Any]]):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                cache_key = key.format(**bound.arguments)
+                if local is not None:
+                    value = local.get(cache_key)
+                    if value is not None:
+                        return value
+                value = await self._get(
+                    cache_key,
+                    lambda: func(*args, **kwargs),
+                    adapter,
+                    ttl,
+                    stale_ttl,
+                )
+                if local is not None:
+                    local.set(cache_key, value)
+                return value
+
+            return wrapper
+
+        return decorator
+
+    async def invalidate(self, *keys: str) -> None:
+        if not self.redis_connector.is_connected:
+            return
+        try:
+            for key in keys:
+                # Сначала поколение: загрузки, начатые до сброса, не запишутся
+                await self.redis_connector.incr(self.GENERATION_KEY.format(key=key))
+                await self.redis_connector.delete(self.KEY.format(key=key))
+        except Exception as e:
+            logging.error(f"Не удалось сбросить кеш {keys}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+    async def _get(self, key, load, adapter, ttl, stale_ttl):
+        entry = await self._read(key, adapter)
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until > time.time():
+                self.hits += 1
+                return value
+            # Устаревшую запись пересчитывает только владелец блокировки,
+            # остальные сразу получают старое значение
+            token = None if key in self._inflight else await self._lock(key)
+            if token is not None and key in self._inflight:
+                # Пока брали блокировку, в процессе начался пересчет по
+                # промаху: он и обновит запись, а блокировку отпускаем сразу
+                await self._unlock(key, token)
+                token = None
+            if token is None:
+                self.stale_hits += 1
+                return value
+            return await self._single_flight(
+                key, lambda: self._refresh(key, load, adapter, ttl, stale_ttl, token)
+            )
+
+        self.misses += 1
+        return await self._single_flight(
+            key, lambda: self._load_on_miss(key, load, adapter, ttl, stale_ttl)
+        )
+
+    async def _single_flight(self, key: str, load: Callable[[], Awaitable[Any]]):
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Отменили запрос-лидер, а не нас: считаем сами
+                return await self._single_flight(key, load)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение уже передано ждущим; без этого asyncio пишет в лог
+            # "exception was never retrieved", если ждущих не было
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load_on_miss(self, key, load, adapter, ttl, stale_ttl):
+        token = await self._lock(key)
+        # Значение считает другой воркер: ждем его, но не дольше lock_wait.
+        # Блокировка снята без записи (загрузка упала, например 404) -
+        # ждать нечего, пробуем считать сами
+        deadline = time.monotonic() + self.lock_wait
+        while token is None and time.monotonic() < deadline:
+            await asyncio.sleep(self.POLL_INTERVAL)
+            entry = await self._read(key, adapter)
+            if entry is not None:
+                return entry[1]
+            if not await self._is_locked(key):
+                token = await self._lock(key)
+        return await self._refresh(key, load, adapter, ttl, stale_ttl, token)
+
+    async def _refresh(self, key, load, adapter, ttl, stale_ttl, token):
+        try:
+            generation = await self._generation(key)
+            value = await load()
+            if generation is not None:
+                await self._write(key, value, adapter, ttl, stale_ttl, generation)
+            return value
+        finally:
+            await self._unlock(key, token)
+
+    # Redis - необязательный уровень: при его недоступности работаем через БД
+    async def _read(self, key: str, adapter: TypeAdapter):
+        if not self.redis_connector.is_connected:
+            return None
+        try:
+            cached = await self.redis_connector.get(self.KEY.format(key=key))
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать кеш {key} из Redis: {e}")
+            return None
+        if cached is None:
+            return None
+        if isinstance(cached, bytes):
+            cached = cached.decode()
+        fresh_until, payload = cached.split("|", 1)
+        return float(fresh_until), adapter.validate_json(payload)
+
+    async def _generation(self, key: str) -> str | None:
+        """Поколение ключа до загрузки; None - записывать результат нельзя"""
+        if not self.redis_connector.is_connected:
+            return None
+        try:
+            generation = await self.redis_connector.get(
+                self.GENERATION_KEY.format(key=key)
+            )
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать поколение кеша {key}: {e}")
+            return None
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return generation or "0"
+
+    async def _write(self, key, value, adapter, ttl, stale_ttl, generation) -> None:
+        fresh_until = time.time() + ttl
+        payload = adapter.dump_json(value).decode()
+        try:
+            await self.redis_connector.eval(
+                WRITE_SCRIPT,
+                [self.KEY.format(key=key), self.GENERATION_KEY.format(key=key)],
+                [generation, f"{fresh_until}|{payload}", ttl + stale_ttl],
+            )
+        except Exception as e:
+            logging.warning(f"Не удалось сохранить кеш {key} в Redis: {e}")
+
+    async def _lock(self, key: str) -> str | None:
+        """Токен блокировки; None - блокировка у другого воркера.
+
+        Без Redis возвращается пустой токен: считаем без блокировки.
+        """
+        if not self.redis_connector.is_connected:
+            return ""
+        token = uuid4().hex
+        try:
+            acquired = await self.redis_connector.set_if_not_exists(
+                self.LOCK_KEY.format(key=key), token, expire=self.lock_ttl
+            )
+        except Exception as e:
+            logging.warning(f"Не удалось взять блокировку кеша {key}: {e}")
+            return ""
+        return token if acquired else None
+
+    async def _is_locked(self, key: str) -> bool:
+        try:
+            return await self.redis_connector.exists(self.LOCK_KEY.format(key=key))
+        except Exception as e:
+            logging.warning(f"Не удалось проверить блокировку кеша {key}: {e}")
+            return False
+
+    async def _unlock(self, key: str, token: str | None) -> None:
+        if not token:
+            return
+        try:
+            await self.redis_connector.eval(
+                UNLOCK_SCRIPT, [self.LOCK_KEY.format(key=key)], [token]
+            )
+        except Exception as e:
+            logging.warning(f"Не удалось снять блокировку кеша {key}: {e}")
@@ -0,0 +1,116 @@
+import logging
+
+from src.connectors.redis_connector import RedisConnector
+from src.exceptions.exception import ProductSoldOutException
+
+# Все-или-ничего: сначала проверяем все счетчики, потом списываем.
+# Товары без ключа (шлюз выключен) пропускаются
+ACQUIRE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local stock = redis.call('GET', key)
+    if stock and tonumber(stock) < tonumber(ARGV[i]) then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('DECRBY', key, ARGV[i])
+    end
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('INCRBY', key, ARGV[i])
+    end
+end
+return 0
+"""
+
+
+class StockGate:
+    """Счетчики остатков в Redis перед Postgres для товаров флеш-распродаж.
+
+    Шлюз включается на товар явно. Распроданный товар отсекается атомарным
+    Lua-скриптом в Redis, и запрос не доходит до строки products. Источник
+    истины - БД: условное списание в Postgres остается, а счетчики
+    периодически выравниваются по stock_quantity (reconcile).
+    """
+
+    KEY = "stock_gate:{product_id}"
+    PRODUCTS_KEY = "stock_gate:products"
+
+    def __init__(self, redis_connector: RedisConnector):
+        self.redis_connector = redis_connector
+
+    async def enable(self, product_id: int, stock_quantity: int) -> None:
+        await self.redis_connector.set(self._key(product_id), str(stock_quantity))
+        await self.redis_connector.sadd(self.PRODUCTS_KEY, product_id)
+
+    async def disable(self, product_id: int) -> None:
+        await self.redis_connector.delete(self._key(product_id))
+        await self.redis_connector.srem(self.PRODUCTS_KEY, product_id)
+
+    async def gated_products(self) -> list[int]:
+        members = await self.redis_connector.smembers(self.PRODUCTS_KEY)
+        return sorted(int(member) for member in members)
+
+    async def reset(self, product_id: int, stock_quantity: int) -> None:
+        """Выставить счетчик по остатку в БД, только если шлюз включен"""
+        await self.redis_connector.eval(
+            "if redis.call('EXISTS', KEYS[1]) == 1 then "
+            "redis.call('SET', KEYS[1], ARGV[1]) end return 0",
+            [self._key(product_id)],
+            [stock_quantity],
+        )
+
+    async def check(self, quantities: dict[int, int]) -> None:
+        """Проверка без списания (добавление в корзину)"""
+        if not self.redis_connector.is_connected:
+            return
+        for product_id, quantity in quantities.items():
+            try:
+                stock = await self.redis_connector.get(self._key(product_id))
+            except Exception as e:
+                logging.warning(f"Шлюз остатков недоступен: {e}")
+                return
+            if stock is not None and int(stock) < quantity:
+                raise ProductSoldOutException(product_id)
+
+    async def acquire(self, quantities: dict[int, int]) -> bool:
+        """Списать счетчики шлюза. True - списание было, нужен release при сбое.
+
+        При недоступном Redis пропускаем: остатки все равно проверит БД.
+        """
+        if not self.redis_connector.is_connected or not quantities:
+            return False
+        product_ids = sorted(quantities)
+        try:
+            failed = await self.redis_connector.eval(
+                ACQUIRE_SCRIPT,
+                [self._key(product_id) for product_id in product_ids],
+                [quantities[product_id] for product_id in product_ids],
+            )
+        except Exception as e:
+            logging.warning(f"Шлюз остатков недоступен: {e}")
+            return False
+        if failed:
+            raise ProductSoldOutException(product_ids[int(failed) - 1])
+        return True
+
+    async def release(self, quantities: dict[int, int]) -> None:
+        product_ids = sorted(quantities)
+        try:
+            await self.redis_connector.eval(
+                RELEASE_SCRIPT,
+                [self._key(product_id) for product_id in product_ids],
+                [quantities[product_id] for product_id in product_ids],
+            )
+        except Exception as e:
+            # Расхождение уберет ближайший reconcile
+            logging.error(f"Не удалось вернуть остатки в шлюз: {e}")
+
+    def _key(self, product_id: int) -> str:
+        return self.KEY.format(product_id=product_id)